@@ -0,0 +1,236 @@
+"""
+Reproducible benchmarks of the simulation and learning hot paths.
+
+    python benchmark.py --output benchmark.json
+    python benchmark.py --output benchmark.json --baseline baseline.json --tolerance 0.2
+
+Every benchmark runs at fixed seeds without network access, the results are written as JSON
+and compared against a baseline file when one is given, the exit code is 1 when a regression is found.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import numpy as np
+
+import card_source
+import environment_model
+import exact_solver
+import frozen_policy_strategy
+import game_definitions
+import game_logic
+import player
+import random_fixed_strategy
+import random_learning_strategy
+import running_statistics
+
+random_seed = 123
+# units where a larger value is better, every other unit is a cost
+throughput_units = {"episodes/s"}
+
+typical_hands = [
+    [game_definitions.Card.TEN, game_definitions.Card.SIX],
+    [game_definitions.Card.ACE, game_definitions.Card.SEVEN],
+    [game_definitions.Card.TWO, game_definitions.Card.THREE, game_definitions.Card.FOUR, game_definitions.Card.FIVE],
+    [game_definitions.Card.ACE, game_definitions.Card.ACE, game_definitions.Card.NINE],
+    [game_definitions.Card.KING, game_definitions.Card.QUEEN, game_definitions.Card.TWO],
+]
+
+
+def create_player(strategy_name: str, source: card_source.CardSource) -> player.Player:
+    em = environment_model.EnvironmentModel()
+    if strategy_name == "learning":
+        player_strategy = random_learning_strategy.Random_learning_strategy(
+            environment_model=em,
+            probability_of_random_choice=.1,
+            default_probability_of_stand=.5,
+            random_source=source
+            )
+    elif strategy_name == "fixed":
+        player_strategy = random_fixed_strategy.Random_fixed_strategy(
+            environment_model=exact_solver.solve(),
+            default_probability_of_stand=.5,
+            random_source=source
+            )
+    elif strategy_name == "frozen":
+        player_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(exact_solver.solve())
+    else:
+        raise Exception(f"Unknown strategy: {strategy_name}")
+    return player.Player(strategy=player_strategy)
+
+
+def measure(operation: Callable[[], None], operation_count: int, repeat: int) -> Dict[str, float]:
+    """ Returns the best time per operation out of repeat runs and the peak traced memory of one more run """
+    best_seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    operation()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds_per_operation": best_seconds / operation_count, "peak_memory_bytes": peak_memory}
+
+
+def benchmark_deck_evaluation(scale: int, repeat: int):
+    operation_count = 1_000 * scale
+
+    def operation():
+        for i in range(operation_count):
+            game_logic.evaluate_nonbusting_deck_values(typical_hands[i % len(typical_hands)])
+    return "ns/op", measure(operation, operation_count, repeat)
+
+
+def benchmark_play(strategy_name: str):
+    def benchmark(scale: int, repeat: int):
+        episode_count = 1_000 * scale
+        source = card_source.CardSource(random_seed)
+        player_instance = create_player(strategy_name, source)
+
+        def operation():
+            for _ in range(episode_count):
+                game_logic.play(player_instance, source)
+        return "episodes/s", measure(operation, episode_count, repeat)
+    return benchmark
+
+
+def benchmark_play_batch(scale: int, repeat: int):
+    episode_count = 10_000 * scale
+    source = card_source.CardSource(random_seed)
+    player_instance = create_player("learning", source)
+    return "episodes/s", measure(
+        lambda: game_logic.play_batch(player_instance.strategy, episode_count, source),
+        episode_count,
+        repeat
+    )
+
+
+def benchmark_game_finished(scale: int, repeat: int):
+    source = card_source.CardSource(random_seed)
+    player_instance = create_player("learning", source)
+    episodes = [game_logic.play(player_instance, source) for _ in range(1_000)]
+    operation_count = 1_000 * scale
+
+    def operation():
+        for i in range(operation_count):
+            game_status, player_visited_bare_states = episodes[i % len(episodes)]
+            player_instance.strategy.game_finished(
+                game_logic.get_player_reward(game_status),
+                player_visited_bare_states,
+                1.0,
+                .1
+                )
+    return "ns/op", measure(operation, operation_count, repeat)
+
+
+def benchmark_model_get_set(scale: int, repeat: int):
+    em = environment_model.EnvironmentModel()
+    states = [(player_sum, dealer_value, usable_ace) for player_sum in range(12, 22) for dealer_value in range(2, 12) for usable_ace in (False, True)]
+    operation_count = 1_000 * scale
+
+    def operation():
+        for i in range(operation_count):
+            state = states[i % len(states)]
+            value = em.get_state_action_value(state, game_definitions.Action.HIT)
+            em.set_state_action_value(state, game_definitions.Action.HIT, value + 1)
+    return "ns/op", measure(operation, operation_count, repeat)
+
+
+def benchmark_training_loop(episodes_per_batch: int):
+    def benchmark(scale: int, repeat: int):
+        episode_count = 1_000 * scale
+
+        def operation():
+            # the same work main.py does per episode, without printing and plotting
+            source = card_source.CardSource(random_seed)
+            player_instance = create_player("learning", source)
+            player_statistics = running_statistics.RunningStatistics(10_000)
+            episodes = game_logic.play_episodes(player_instance, episode_count, episodes_per_batch, source)
+            for game_status, player_visited_bare_states in episodes:
+                player_instance.end_game(
+                    game_logic.get_player_reward(game_status),
+                    player_visited_bare_states,
+                    1.0,
+                    .1
+                    )
+                player_statistics.update(game_status)
+        return "episodes/s", measure(operation, episode_count, repeat)
+    return benchmark
+
+
+benchmarks = {
+    "evaluate_nonbusting_deck_values": benchmark_deck_evaluation,
+    "play_learning_strategy": benchmark_play("learning"),
+    "play_fixed_strategy": benchmark_play("fixed"),
+    "play_frozen_strategy": benchmark_play("frozen"),
+    "play_batch_learning_strategy": benchmark_play_batch,
+    "game_finished_learning_strategy": benchmark_game_finished,
+    "environment_model_get_set": benchmark_model_get_set,
+    "training_loop": benchmark_training_loop(1),
+    "training_loop_batched": benchmark_training_loop(1_000),
+}
+
+
+def run_benchmarks(scale: int, repeat: int) -> dict:
+    results = {}
+    for name, benchmark in benchmarks.items():
+        unit, measurement = benchmark(scale, repeat)
+        if unit == "episodes/s":
+            value = 1 / measurement["seconds_per_operation"]
+        else:
+            value = measurement["seconds_per_operation"] * 1e9
+        results[name] = {"unit": unit, "value": value, "peak_memory_bytes": measurement["peak_memory_bytes"]}
+        print(f"{name}: {value:,.1f} {unit}, peak memory {measurement['peak_memory_bytes']:,} B")
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "scale": scale,
+        "benchmarks": results
+    }
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """ Returns a description of every benchmark that got worse than the baseline by more than the tolerance fraction """
+    regressions = []
+    for name, baseline_result in baseline["benchmarks"].items():
+        if name not in results["benchmarks"]:
+            continue
+        value = results["benchmarks"][name]["value"]
+        baseline_value = baseline_result["value"]
+        if baseline_result["unit"] in throughput_units:
+            regressed = value < baseline_value * (1 - tolerance)
+        else:
+            regressed = value > baseline_value * (1 + tolerance)
+        if regressed:
+            regressions.append(f"{name}: {value:,.1f} {baseline_result['unit']} against the baseline {baseline_value:,.1f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark.json", help="where the results are written")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=.2, help="allowed relative slowdown before a regression is reported")
+    parser.add_argument("--scale", type=int, default=10, help="multiplies the amount of work of every benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of this many runs is reported")
+    arguments = parser.parse_args()
+
+    results = run_benchmarks(arguments.scale, arguments.repeat)
+    with open(arguments.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
@@ -0,0 +1,27 @@
+import benchmark
+
+
+def test_regressions_depend_on_the_direction_of_the_unit():
+    baseline = {"benchmarks": {
+        "throughput": {"unit": "episodes/s", "value": 1000.0},
+        "cost": {"unit": "ns/op", "value": 100.0},
+        "removed": {"unit": "ns/op", "value": 100.0},
+    }}
+    improved = {"benchmarks": {
+        "throughput": {"unit": "episodes/s", "value": 2000.0},
+        "cost": {"unit": "ns/op", "value": 50.0},
+    }}
+    regressed = {"benchmarks": {
+        "throughput": {"unit": "episodes/s", "value": 700.0},
+        "cost": {"unit": "ns/op", "value": 130.0},
+    }}
+    assert benchmark.find_regressions(improved, baseline, .2) == []
+    assert len(benchmark.find_regressions(regressed, baseline, .2)) == 2
+    assert benchmark.find_regressions(regressed, baseline, .5) == []
+
+
+def test_benchmarks_run_at_a_small_scale():
+    unit, measurement = benchmark.benchmarks["training_loop_batched"](1, 1)
+    assert unit == "episodes/s"
+    assert measurement["seconds_per_operation"] > 0
+    assert measurement["peak_memory_bytes"] > 0
@@ -0,0 +1,85 @@
+import numpy as np
+
+import game_definitions
+
+cards = list(game_definitions.Card)
+
+
+class CardSource:
+    """
+    Deals cards of the infinite deck and uniform random numbers from blocks pre-drawn from seeded numpy Generators,
+    cards and random numbers come from independent streams so the cards do not depend on how many random numbers were used
+    """
+
+    # the cards of the infinite deck are independent, which the exact dealer distributions rely on
+    is_infinite = True
+
+    def __init__(self, seed=None, block_size: int = 4096):
+        card_seed_sequence, random_seed_sequence = np.random.SeedSequence(seed).spawn(2)
+        self.card_generator = np.random.default_rng(card_seed_sequence)
+        self.random_generator = np.random.default_rng(random_seed_sequence)
+        self.block_size = block_size
+        # python lists make drawing a single element cheaper than indexing numpy arrays
+        self._card_index_block = []
+        self._card_index_position = 0
+        self._random_block = []
+        self._random_position = 0
+
+    def begin_round(self):
+        # an infinite deck is never reshuffled
+        pass
+
+    def draw_card_index(self) -> int:
+        if self._card_index_position == len(self._card_index_block):
+            self._card_index_block = self.card_generator.integers(len(cards), size=self.block_size).tolist()
+            self._card_index_position = 0
+        card_index = self._card_index_block[self._card_index_position]
+        self._card_index_position += 1
+        return card_index
+
+    def draw_card(self) -> game_definitions.Card:
+        return cards[self.draw_card_index()]
+
+    def draw_card_indices(self, count: int) -> np.ndarray:
+        # the buffered indices are dealt first, the remaining ones are drawn in bulk
+        buffered = self._card_index_block[self._card_index_position:self._card_index_position + count]
+        self._card_index_position += len(buffered)
+        return np.concatenate((
+            np.array(buffered, dtype=np.int64),
+            self.card_generator.integers(len(cards), size=count - len(buffered))
+        ))
+
+    def random(self) -> float:
+        if self._random_position == len(self._random_block):
+            self._random_block = self.random_generator.random(self.block_size).tolist()
+            self._random_position = 0
+        value = self._random_block[self._random_position]
+        self._random_position += 1
+        return value
+
+    def random_array(self, count: int) -> np.ndarray:
+        buffered = self._random_block[self._random_position:self._random_position + count]
+        self._random_position += len(buffered)
+        return np.concatenate((
+            np.array(buffered, dtype=np.float64),
+            self.random_generator.random(count - len(buffered))
+        ))
+
+    def get_state(self) -> dict:
+        # everything needed to continue the streams exactly where they are
+        return {
+            "block_size": self.block_size,
+            "card_generator": self.card_generator.bit_generator.state,
+            "random_generator": self.random_generator.bit_generator.state,
+            "card_index_block": self._card_index_block[self._card_index_position:],
+            "random_block": self._random_block[self._random_position:]
+        }
+
+    def set_state(self, state: dict):
+        self.block_size = state["block_size"]
+        self.card_generator.bit_generator.state = state["card_generator"]
+        self.random_generator.bit_generator.state = state["random_generator"]
+        self._card_index_block = list(state["card_index_block"])
+        self._card_index_position = 0
+        self._random_block = list(state["random_block"])
+        self._random_position = 0
@@ -0,0 +1,51 @@
+import numpy as np
+
+import card_source
+import environment_model
+import game_definitions
+import game_logic
+import player
+import random_learning_strategy
+
+
+def test_card_source_is_reproducible_and_block_independent():
+    small_blocks = card_source.CardSource(seed=123, block_size=7)
+    large_blocks = card_source.CardSource(seed=123, block_size=4096)
+    small_block_cards = [small_blocks.draw_card() for _ in range(100)]
+    assert small_block_cards == [large_blocks.draw_card() for _ in range(100)]
+    assert all(card in game_definitions.Card for card in small_block_cards)
+    # bulk draws continue the same stream
+    assert np.array_equal(small_blocks.draw_card_indices(50), large_blocks.draw_card_indices(50))
+    assert small_blocks.draw_card_index() == large_blocks.draw_card_index()
+
+
+def test_card_source_draws_are_uniform():
+    source = card_source.CardSource(seed=123)
+    counts = np.bincount(source.draw_card_indices(130_000), minlength=len(game_definitions.Card))
+    assert np.allclose(counts / 130_000, 1 / len(game_definitions.Card), atol=.005)
+    random_numbers = source.random_array(100_000)
+    assert np.all((0 <= random_numbers) & (random_numbers < 1))
+    assert abs(np.mean(random_numbers) - .5) < .01
+
+
+def test_cards_do_not_depend_on_random_number_usage():
+    source = card_source.CardSource(seed=123)
+    other_source = card_source.CardSource(seed=123)
+    for _ in range(10):
+        source.random()
+    assert [source.draw_card() for _ in range(20)] == [other_source.draw_card() for _ in range(20)]
+
+
+def test_play_with_card_source_is_reproducible():
+    def play_games():
+        source = card_source.CardSource(seed=123)
+        em = environment_model.EnvironmentModel()
+        learning_strategy = random_learning_strategy.Random_learning_strategy(
+            environment_model=em,
+            probability_of_random_choice=.1,
+            default_probability_of_stand=.5,
+            random_source=source
+            )
+        player_instance = player.Player(strategy=learning_strategy)
+        return [game_logic.play(player_instance, source) for _ in range(200)]
+    assert play_games() == play_games()
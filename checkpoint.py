@@ -0,0 +1,99 @@
+import json
+import os
+from typing import Optional
+
+import numpy as np
+
+import card_source
+import environment_model
+import replay_buffer
+import running_statistics
+
+format_version = 1
+
+
+def save_checkpoint(
+    path: str,
+    envmodel: environment_model.EnvironmentModel,
+    player_card_source: card_source.CardSource,
+    player_statistics: running_statistics.RunningStatistics,
+    completed_episode_count: int,
+    player_replay_buffer: Optional[replay_buffer.ReplayBuffer] = None
+    ):
+    """
+    Writes the tables of envmodel, the state of the random streams, the statistics and the transitions of the replay buffer
+    into one uncompressed .npz file, the file is written next to the destination first and then renamed
+    so that a crash never leaves a partial checkpoint
+    """
+    source_state = player_card_source.get_state()
+    statistics_state = player_statistics.get_state()
+    replay_arrays = {}
+    if player_replay_buffer is not None:
+        replay_state = player_replay_buffer.get_state()
+        replay_arrays = {f"replay_{key}": replay_state[key] for key in ("state_indices", "action_indices", "returns")}
+    header = {
+        "format_version": format_version,
+        "completed_episode_count": completed_episode_count,
+        "card_source": {
+            "block_size": source_state["block_size"],
+            "card_generator": source_state["card_generator"],
+            "random_generator": source_state["random_generator"]
+        },
+        "statistics": {key: value for key, value in statistics_state.items() if key != "window"}
+    }
+    if player_replay_buffer is not None:
+        header["replay_buffer"] = {"capacity": player_replay_buffer.capacity}
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as checkpoint_file:
+        np.savez(
+            checkpoint_file,
+            header=np.array(json.dumps(header)),
+            state_to_value=envmodel.state_to_value,
+            state_visit_count=envmodel.state_visit_count,
+            state_explore_count=envmodel.state_explore_count,
+            card_index_block=np.array(source_state["card_index_block"], dtype=np.int64),
+            random_block=np.array(source_state["random_block"], dtype=np.float64),
+            statistics_window=statistics_state["window"],
+            **replay_arrays
+        )
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def restore_checkpoint(
+    path: str,
+    envmodel: environment_model.EnvironmentModel,
+    player_card_source: card_source.CardSource,
+    player_statistics: running_statistics.RunningStatistics,
+    player_replay_buffer: Optional[replay_buffer.ReplayBuffer] = None
+    ) -> int:
+    """ Restores the objects saved by save_checkpoint() in place and returns the number of completed episodes """
+    with np.load(path, allow_pickle=False) as checkpoint:
+        header = json.loads(str(checkpoint["header"]))
+        if header["format_version"] != format_version:
+            raise Exception(f"Unsupported checkpoint format version: {header['format_version']}")
+        # resuming without the transitions that were not yet learned from would silently change the training
+        if ("replay_buffer" in header) != (player_replay_buffer is not None):
+            raise Exception("A checkpoint can only be restored with a replay buffer if it was saved with one.")
+        np.copyto(envmodel.state_to_value, checkpoint["state_to_value"])
+        np.copyto(envmodel.state_visit_count, checkpoint["state_visit_count"])
+        np.copyto(envmodel.state_explore_count, checkpoint["state_explore_count"])
+        player_card_source.set_state({
+            **header["card_source"],
+            # the blocks are restored as python floats and ints so that the streams stay bit-for-bit identical
+            "card_index_block": checkpoint["card_index_block"].tolist(),
+            "random_block": checkpoint["random_block"].tolist()
+        })
+        player_statistics.set_state({
+            **header["statistics"],
+            "window": checkpoint["statistics_window"]
+        })
+        if player_replay_buffer is not None:
+            player_replay_buffer.set_state({
+                **header["replay_buffer"],
+                "state_indices": checkpoint["replay_state_indices"],
+                "action_indices": checkpoint["replay_action_indices"],
+                "returns": checkpoint["replay_returns"]
+            })
+    return header["completed_episode_count"]
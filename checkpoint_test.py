@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+import card_source
+import checkpoint
+import environment_model
+import game_logic
+import player
+import random_learning_strategy
+import replay_buffer
+import running_statistics
+
+
+def create_training_objects():
+    source = card_source.CardSource(seed=123, block_size=100)
+    em = environment_model.EnvironmentModel()
+    learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=em,
+        probability_of_random_choice=.1,
+        default_probability_of_stand=.5,
+        random_source=source
+        )
+    return player.Player(strategy=learning_strategy), source, running_statistics.RunningStatistics(50)
+
+
+def train(player_instance, source, player_statistics, episode_count, episodes_per_batch):
+    episodes = game_logic.play_episodes(player_instance, episode_count, episodes_per_batch, source)
+    for game_status, player_visited_bare_states in episodes:
+        player_instance.end_game(game_logic.get_player_reward(game_status), player_visited_bare_states, 1.0, .1)
+        player_statistics.update(game_status)
+
+
+def test_resumed_training_is_identical_to_uninterrupted_training(tmp_path):
+    for episodes_per_batch in (1, 20):
+        player_instance, source, player_statistics = create_training_objects()
+        train(player_instance, source, player_statistics, 1000, episodes_per_batch)
+
+        interrupted_player, interrupted_source, interrupted_statistics = create_training_objects()
+        train(interrupted_player, interrupted_source, interrupted_statistics, 400, episodes_per_batch)
+        checkpoint_path = str(tmp_path / "checkpoint.npz")
+        checkpoint.save_checkpoint(
+            checkpoint_path,
+            interrupted_player.strategy.environment_model,
+            interrupted_source,
+            interrupted_statistics,
+            400
+            )
+
+        resumed_player, resumed_source, resumed_statistics = create_training_objects()
+        completed_episode_count = checkpoint.restore_checkpoint(
+            checkpoint_path,
+            resumed_player.strategy.environment_model,
+            resumed_source,
+            resumed_statistics
+            )
+        assert completed_episode_count == 400
+        train(resumed_player, resumed_source, resumed_statistics, 600, episodes_per_batch)
+
+        em = player_instance.strategy.environment_model
+        resumed_em = resumed_player.strategy.environment_model
+        assert np.array_equal(em.state_to_value, resumed_em.state_to_value)
+        assert np.array_equal(em.state_visit_count, resumed_em.state_visit_count)
+        assert np.array_equal(em.state_explore_count, resumed_em.state_explore_count)
+        assert player_statistics.status_counts == resumed_statistics.status_counts
+        assert player_statistics.win_ratio == resumed_statistics.win_ratio
+        assert player_statistics.latest_win_ratio == resumed_statistics.latest_win_ratio
+        assert player_statistics.latest_draw_ratio == resumed_statistics.latest_draw_ratio
+
+
+def train_from_replay(player_instance, source, learner, episode_count):
+    for statuses, trajectories in game_logic.play_batches(player_instance.strategy, episode_count, 50, source):
+        learner.buffer.add_batch(game_logic.status_value_to_reward[statuses], trajectories, 1.0)
+        learner.learn(2)
+
+
+def test_resumed_replay_training_is_identical_to_uninterrupted_training(tmp_path):
+    def create_replay_training_objects():
+        player_instance, source, player_statistics = create_training_objects()
+        learner = replay_buffer.ReplayLearner(
+            player_instance.strategy.environment_model,
+            replay_buffer.ReplayBuffer(500),
+            .1,
+            64,
+            replay_buffer.SamplingMethod.UNIFORM,
+            source
+            )
+        return player_instance, source, player_statistics, learner
+
+    player_instance, source, _, learner = create_replay_training_objects()
+    train_from_replay(player_instance, source, learner, 1000)
+
+    interrupted_player, interrupted_source, interrupted_statistics, interrupted_learner = create_replay_training_objects()
+    train_from_replay(interrupted_player, interrupted_source, interrupted_learner, 400)
+    checkpoint_path = str(tmp_path / "checkpoint.npz")
+    checkpoint.save_checkpoint(
+        checkpoint_path,
+        interrupted_player.strategy.environment_model,
+        interrupted_source,
+        interrupted_statistics,
+        400,
+        interrupted_learner.buffer
+        )
+
+    resumed_player, resumed_source, resumed_statistics, resumed_learner = create_replay_training_objects()
+    with pytest.raises(Exception):
+        # the transitions in the buffer must not be dropped silently
+        checkpoint.restore_checkpoint(checkpoint_path, resumed_player.strategy.environment_model, resumed_source, resumed_statistics)
+    checkpoint.restore_checkpoint(
+        checkpoint_path,
+        resumed_player.strategy.environment_model,
+        resumed_source,
+        resumed_statistics,
+        resumed_learner.buffer
+        )
+    assert len(resumed_learner.buffer) == len(interrupted_learner.buffer)
+    train_from_replay(resumed_player, resumed_source, resumed_learner, 600)
+
+    assert np.array_equal(player_instance.strategy.environment_model.state_to_value, resumed_player.strategy.environment_model.state_to_value)
+    assert np.array_equal(learner.buffer.get_state()["returns"], resumed_learner.buffer.get_state()["returns"])
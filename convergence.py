@@ -0,0 +1,103 @@
+from typing import Optional
+
+import numpy as np
+
+import environment_model
+import exact_solver
+import game_definitions
+import running_statistics
+
+
+class ConvergenceMonitor:
+    """
+    Compares the action values of the decision states at the end of consecutive windows of episodes.
+    Training has converged once every configured threshold held for patience consecutive windows:
+    the maximal and the mean absolute action value change, the number of states whose greedy action flipped
+    and the half width of the confidence interval of the total win ratio, None disables a threshold
+    """
+
+    def __init__(
+        self,
+        max_value_change_threshold: Optional[float] = None,
+        mean_value_change_threshold: Optional[float] = None,
+        policy_flip_count_threshold: Optional[int] = 0,
+        win_ratio_interval_half_width_threshold: Optional[float] = None,
+        confidence_z_score: float = 1.96,
+        patience: int = 3
+        ):
+        self.max_value_change_threshold = max_value_change_threshold
+        self.mean_value_change_threshold = mean_value_change_threshold
+        self.policy_flip_count_threshold = policy_flip_count_threshold
+        self.win_ratio_interval_half_width_threshold = win_ratio_interval_half_width_threshold
+        self.confidence_z_score = confidence_z_score
+        self.patience = patience
+        self._decision_state_mask = exact_solver.get_decision_state_mask()
+        self._previous_values = None
+        self.window_count = 0
+        self.consecutive_converged_window_count = 0
+        self.max_value_change = np.inf
+        self.mean_value_change = np.inf
+        self.policy_flip_count = None
+        self.win_ratio_interval_half_width = np.inf
+
+    def get_greedy_actions(self, values: np.ndarray) -> np.ndarray:
+        # 1 stands, -1 hits and 0 marks ties which the strategies break randomly
+        return np.sign(
+            values[..., environment_model.action_indices[game_definitions.Action.STAND]]
+            - values[..., environment_model.action_indices[game_definitions.Action.HIT]]
+        )[self._decision_state_mask]
+
+    def update(
+        self,
+        envmodel: environment_model.EnvironmentModel,
+        statistics: Optional[running_statistics.RunningStatistics] = None
+        ) -> bool:
+        """ Closes the current window and returns whether training has converged """
+        values = envmodel.state_to_value
+        if self._previous_values is not None:
+            value_changes = np.abs(values - self._previous_values)[self._decision_state_mask]
+            self.max_value_change = float(value_changes.max())
+            self.mean_value_change = float(value_changes.mean())
+            self.policy_flip_count = int(np.count_nonzero(
+                self.get_greedy_actions(values) != self.get_greedy_actions(self._previous_values)
+            ))
+        if statistics is not None and statistics.episode_count > 0:
+            self.win_ratio_interval_half_width = \
+                self.confidence_z_score * statistics.win_ratio_std / np.sqrt(statistics.episode_count)
+        self._previous_values = values.copy()
+        self.window_count += 1
+
+        # the first window has nothing to be compared with
+        thresholds_hold = self.policy_flip_count is not None and all((
+            self.max_value_change_threshold is None or self.max_value_change <= self.max_value_change_threshold,
+            self.mean_value_change_threshold is None or self.mean_value_change <= self.mean_value_change_threshold,
+            self.policy_flip_count_threshold is None or self.policy_flip_count <= self.policy_flip_count_threshold,
+            self.win_ratio_interval_half_width_threshold is None
+                or self.win_ratio_interval_half_width <= self.win_ratio_interval_half_width_threshold
+        ))
+        self.consecutive_converged_window_count = self.consecutive_converged_window_count + 1 if thresholds_hold else 0
+        return self.has_converged
+
+    @property
+    def has_converged(self) -> bool:
+        return self.consecutive_converged_window_count >= self.patience
+
+    def format_status(self) -> str:
+        return (
+            f"Action value change: maximal {self.max_value_change: .5f} mean {self.mean_value_change: .3E}"
+            f" policy flips: {self.policy_flip_count}"
+            f" win ratio confidence half width: {self.win_ratio_interval_half_width: .3E}"
+            f" windows within thresholds: {self.consecutive_converged_window_count} out of {self.patience}"
+        )
+
+    def get_stop_reason(self) -> str:
+        thresholds = []
+        if self.max_value_change_threshold is not None:
+            thresholds.append(f"maximal action value change <= {self.max_value_change_threshold}")
+        if self.mean_value_change_threshold is not None:
+            thresholds.append(f"mean action value change <= {self.mean_value_change_threshold}")
+        if self.policy_flip_count_threshold is not None:
+            thresholds.append(f"policy flips <= {self.policy_flip_count_threshold}")
+        if self.win_ratio_interval_half_width_threshold is not None:
+            thresholds.append(f"win ratio confidence half width <= {self.win_ratio_interval_half_width_threshold}")
+        return f"{', '.join(thresholds)} held for {self.consecutive_converged_window_count} consecutive windows"
@@ -0,0 +1,40 @@
+import convergence
+import environment_model
+import running_statistics
+from game_definitions import Status
+
+
+def test_stops_after_patience_windows_without_changes():
+    em = environment_model.EnvironmentModel()
+    monitor = convergence.ConvergenceMonitor(max_value_change_threshold=.01, patience=2)
+    # the first window has nothing to be compared with
+    assert not monitor.update(em)
+    em.state_to_value[15, 10, 0, 1] = 1.0
+    assert not monitor.update(em)
+    assert monitor.policy_flip_count == 1
+    assert monitor.max_value_change == 1.0
+    assert not monitor.update(em)
+    assert monitor.update(em)
+    assert "policy flips <= 0" in monitor.get_stop_reason()
+
+
+def test_changes_outside_of_decision_states_are_ignored():
+    em = environment_model.EnvironmentModel()
+    monitor = convergence.ConvergenceMonitor(patience=1)
+    monitor.update(em)
+    em.state_to_value[5, 10, 0, 0] = 1.0
+    assert monitor.update(em)
+    assert monitor.max_value_change == 0
+
+
+def test_win_ratio_interval_threshold():
+    em = environment_model.EnvironmentModel()
+    statistics = running_statistics.RunningStatistics(10)
+    monitor = convergence.ConvergenceMonitor(win_ratio_interval_half_width_threshold=.05, patience=1)
+    for status in [Status.PLAYER_WON, Status.DEALER_WON] * 10:
+        statistics.update(status)
+    monitor.update(em, statistics)
+    assert not monitor.update(em, statistics)
+    for status in [Status.PLAYER_WON, Status.DEALER_WON] * 1_000:
+        statistics.update(status)
+    assert monitor.update(em, statistics)
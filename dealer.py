@@ -1,8 +1,92 @@
+import functools
 from game_definitions import Action, Card
-from typing import List
-import game_logic
+from typing import Dict, List, Tuple, Union
+import numpy as np
+import environment_model
+import game_definitions
+import hand
 
-def get_action(deck: List[Card]):
-    deck_values = game_logic.evaluate_nonbusting_deck_values(deck)
-    soft_17_rule_satisfied = max(deck_values) >= 17
+# the dealer stands on every 17, including the soft one
+stand_from = 17
+# the index of the final total distributions that collects every busted hand
+bust_index = game_definitions.bust_from
+# the deck is infinite so every card is always equally likely
+card_probability = 1 / len(Card)
+
+def get_action(deck: Union[hand.Hand, List[Card]]):
+    soft_17_rule_satisfied = hand.as_hand(deck).best_total >= stand_from
     return Action.STAND if soft_17_rule_satisfied else Action.HIT
+
+
+def _get_final_total_distribution(
+    hard_total: int,
+    has_ace: bool,
+    memo: Dict[Tuple[int, bool], np.ndarray]
+    ) -> np.ndarray:
+    if (hard_total, has_ace) not in memo:
+        distribution = np.zeros(bust_index + 1)
+        best_total = hand.get_best_total(hard_total, has_ace)
+        if hard_total >= game_definitions.bust_from:
+            distribution[bust_index] = 1
+        elif best_total >= stand_from:
+            distribution[best_total] = 1
+        else:
+            for card in Card:
+                distribution += card_probability * _get_final_total_distribution(
+                    hard_total + hand.card_hard_values[card],
+                    has_ace or card == Card.ACE,
+                    memo
+                )
+        memo[(hard_total, has_ace)] = distribution
+    return memo[(hard_total, has_ace)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_final_total_distributions() -> np.ndarray:
+    """
+    Returns the distribution of the final dealer total under the rule of get_action() for an infinite deck,
+    computed once for every visible dealer card value, i.e. distributions[dealer_value, total] for totals up to 21
+    and distributions[dealer_value, bust_index] for the probability of busting
+    """
+    memo = {}
+    distributions = np.zeros((environment_model.dealer_value_count, bust_index + 1))
+    for card in Card:
+        distributions[max(game_definitions.card_values[card])] = _get_final_total_distribution(
+            hand.card_hard_values[card],
+            card == Card.ACE,
+            memo
+        )
+    # the cached table is shared by every caller
+    distributions.setflags(write=False)
+    return distributions
+
+
+@functools.lru_cache(maxsize=None)
+def get_final_total_cumulative_distributions() -> np.ndarray:
+    cumulative_distributions = np.cumsum(get_final_total_distributions(), axis=1)
+    cumulative_distributions.setflags(write=False)
+    return cumulative_distributions
+
+
+@functools.lru_cache(maxsize=None)
+def get_stand_rewards() -> np.ndarray:
+    """ Returns the exact expected reward of standing indexed by [player_sum, dealer_value] """
+    distributions = get_final_total_distributions()
+    totals = np.arange(game_definitions.bust_from)
+    stand_rewards = np.zeros((environment_model.player_sum_count, environment_model.dealer_value_count))
+    for player_sum in range(environment_model.player_sum_count):
+        stand_rewards[player_sum] = \
+            distributions[:, :game_definitions.bust_from] @ np.sign(player_sum - totals) + distributions[:, bust_index]
+    stand_rewards.setflags(write=False)
+    return stand_rewards
+
+
+def sample_final_totals(dealer_values: np.ndarray, random_numbers: np.ndarray) -> np.ndarray:
+    # inverse transform sampling, bust_index stands for a busted dealer
+    cumulative_distributions = get_final_total_cumulative_distributions()[dealer_values]
+    return np.minimum(np.sum(cumulative_distributions < random_numbers[:, None], axis=1), bust_index)
+
+
+def sample_final_total(dealer_value: int, random_number: float) -> int:
+    cumulative_distribution = get_final_total_cumulative_distributions()[dealer_value]
+    return min(int(np.searchsorted(cumulative_distribution, random_number)), bust_index)
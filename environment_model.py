@@ -1,45 +1,207 @@
 from typing import List, Tuple
 import numpy as np
 
-import game_logic
 import game_definitions
+import hand
+
+# the tables are indexed directly by player sum, dealer card value, usable ace and action index,
+# a few rows at the beginning of each axis stay unused in exchange for not translating the indices
+player_sum_count = game_definitions.bust_from
+dealer_value_count = 1 + max(max(values) for values in game_definitions.card_values.values())
+actions = list(game_definitions.Action)
+action_indices = {action: index for index, action in enumerate(actions)}
+# translates the values of game_definitions.Action into action indices
+action_value_to_index = np.zeros(1 + max(action.value for action in actions), dtype=np.int64)
+for action, index in action_indices.items():
+    action_value_to_index[action.value] = index
+table_shape = (player_sum_count, dealer_value_count, 2, len(actions))
+table_size = player_sum_count * dealer_value_count * 2 * len(actions)
+
+StateActionIndices = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _get_flat_view(table: np.ndarray) -> memoryview:
+    # indexing a flat memoryview reads and writes plain python numbers, several times faster than indexing the array
+    if not table.flags.c_contiguous:
+        raise Exception("The tables of an environment model have to be contiguous.")
+    return memoryview(table.reshape(-1))
+
 
 class EnvironmentModel:
 
     def __init__(self):
-        self.state_to_value = {}
-        self.state_visit_count = {}
-        self.state_explore_count = {}
+        self.state_to_value = np.zeros(table_shape, dtype=np.float64)
+        self.state_visit_count = np.zeros(table_shape, dtype=np.int64)
+        self.state_explore_count = np.zeros(table_shape, dtype=np.int64)
 
     @staticmethod
     def convert_to_state(player_deck, dealer_card) -> Tuple[int, int, bool]:
-        player_nonbusting_deck_values = game_logic.evaluate_nonbusting_deck_values(
-            player_deck)
-        maximal_nonbusting_player_deck_value = max(player_nonbusting_deck_values)
-        usable_ace = len(player_nonbusting_deck_values) > 1
+        player_hand = hand.as_hand(player_deck)
         # we take the maximum since every maximum value of all cards is unique to that card
         dealer_card_value = max(game_definitions.card_values[dealer_card])
-        return (maximal_nonbusting_player_deck_value, dealer_card_value, usable_ace)
+        return (player_hand.best_total, dealer_card_value, player_hand.usable_ace)
+
+    # the scalar accessors go through flat views of the tables that are kept in sync whenever a table is replaced
+    @property
+    def state_to_value(self) -> np.ndarray:
+        return self._state_to_value
+
+    @state_to_value.setter
+    def state_to_value(self, table: np.ndarray):
+        self._state_to_value = table
+        self._value_view = _get_flat_view(table)
+
+    @property
+    def state_visit_count(self) -> np.ndarray:
+        return self._state_visit_count
+
+    @state_visit_count.setter
+    def state_visit_count(self, table: np.ndarray):
+        self._state_visit_count = table
+        self._visit_count_view = _get_flat_view(table)
+
+    @property
+    def state_explore_count(self) -> np.ndarray:
+        return self._state_explore_count
+
+    @state_explore_count.setter
+    def state_explore_count(self, table: np.ndarray):
+        self._state_explore_count = table
+        self._explore_count_view = _get_flat_view(table)
+
+    @staticmethod
+    def get_state_action_flat_index(state: Tuple[int, int, bool], action: game_definitions.Action) -> int:
+        # the position of get_state_action_index() in the flattened tables
+        player_sum, dealer_value, usable_ace = state
+        return ((player_sum * dealer_value_count + dealer_value) * 2 + usable_ace) * len(actions) + action_indices[action]
+
+    @staticmethod
+    def get_state_action_index(state: Tuple[int, int, bool], action: game_definitions.Action) -> Tuple[int, int, int, int]:
+        player_sum, dealer_value, usable_ace = state
+        return player_sum, dealer_value, int(usable_ace), action_indices[action]
+
+    @staticmethod
+    def get_state_action_indices(
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray,
+        actions: np.ndarray
+        ) -> StateActionIndices:
+        # bulk version of get_state_action_index, actions are given as the values of game_definitions.Action
+        return (
+            np.asarray(player_sums, dtype=np.int64),
+            np.asarray(dealer_values, dtype=np.int64),
+            np.asarray(usable_aces, dtype=np.int64),
+            action_value_to_index[actions]
+        )
+
+    @staticmethod
+    def get_state_action_flat_indices(
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray,
+        actions: np.ndarray
+        ) -> np.ndarray:
+        # bulk version of get_state_action_flat_index, the arguments are broadcast against each other
+        player_sums = np.asarray(player_sums, dtype=np.int64)
+        dealer_values = np.asarray(dealer_values, dtype=np.int64)
+        usable_aces = np.asarray(usable_aces, dtype=np.int64)
+        # the actions argument shadows the module level list of actions
+        return ((player_sums * dealer_value_count + dealer_values) * 2 + usable_aces) * len(action_indices) \
+            + action_value_to_index[actions]
 
     def get_state_action_value(self, state: Tuple[int, int, bool], action: game_definitions.Action) -> float:
-        # default value is zero
-        return self.state_to_value.get((state, action), 0)
+        # default value is zero, the flat index is computed inline on the hot paths to save a call
+        player_sum, dealer_value, usable_ace = state
+        return self._value_view[
+            ((player_sum * dealer_value_count + dealer_value) * 2 + usable_ace) * len(actions) + action_indices[action]
+        ]
 
     def set_state_action_value(self, state: Tuple[int, int, bool], action: game_definitions.Action, new_value: float):
-        self.state_to_value[(state, action)] = new_value
+        player_sum, dealer_value, usable_ace = state
+        self._value_view[
+            ((player_sum * dealer_value_count + dealer_value) * 2 + usable_ace) * len(actions) + action_indices[action]
+        ] = new_value
+
+    def update_state_action_value(
+        self,
+        state: Tuple[int, int, bool],
+        action: game_definitions.Action,
+        target: float,
+        learning_rate: float
+        ) -> float:
+        """ Moves the value towards target by learning_rate, counts the visit and returns the new value, all with one lookup """
+        player_sum, dealer_value, usable_ace = state
+        index = ((player_sum * dealer_value_count + dealer_value) * 2 + usable_ace) * len(actions) + action_indices[action]
+        value = self._value_view[index]
+        value += learning_rate * (target - value)
+        self._value_view[index] = value
+        self._visit_count_view[index] += 1
+        return value
+
+    def update_episodes(
+        self,
+        flat_index_rows: List[List[int]],
+        final_rewards: List[float],
+        discount_factor: float,
+        learning_rate: float
+        ):
+        """
+        Learns from whole episodes given as the flat indices of their visited state-action pairs in the order of the visits,
+        every episode is walked backwards exactly like the game_finished of the learning strategies does it
+        """
+        values = self._value_view
+        visit_counts = self._visit_count_view
+        for flat_indices, discounted_reward in zip(flat_index_rows, final_rewards):
+            for index in reversed(flat_indices):
+                value = values[index]
+                value += learning_rate * (discounted_reward - value)
+                values[index] = value
+                visit_counts[index] += 1
+                discounted_reward = value * discount_factor
 
     def get_state_action_visit_count(self, state: Tuple[int, int, bool], action: game_definitions.Action):
         # default value is zero
-        return self.state_visit_count.get((state, action), 0)
+        return self._visit_count_view[self.get_state_action_flat_index(state, action)]
+
+    def get_state_action_values(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray,
+        action: game_definitions.Action
+        ) -> np.ndarray:
+        # bulk version of get_state_action_value for states given column-wise
+        return self.state_to_value[
+            np.asarray(player_sums, dtype=np.int64),
+            np.asarray(dealer_values, dtype=np.int64),
+            np.asarray(usable_aces, dtype=np.int64),
+            action_indices[action]
+        ]
+
+    def get_values_at(self, indices: StateActionIndices) -> np.ndarray:
+        return self.state_to_value[indices]
+
+    def set_values_at(self, indices: StateActionIndices, new_values: np.ndarray):
+        self.state_to_value[indices] = new_values
 
     def increment_state_action_visit_counter(self, state: Tuple[int, int, bool], action: game_definitions.Action):
-        # there might not be any state saved so I use the getter method insted of checking for existance
-        self.state_visit_count[(state, action)] = 1 + self.get_state_action_visit_count(state, action)
+        self._visit_count_view[self.get_state_action_flat_index(state, action)] += 1
+
+    def add_visit_counts_at(self, indices: StateActionIndices, counts=1):
+        # repeated indices are accumulated as opposed to plain fancy index assignment
+        np.add.at(self.state_visit_count, indices, counts)
 
     def get_state_action_explore_count(self, state: Tuple[int, int, bool], action: game_definitions.Action):
         # default value is zero
-        return self.state_explore_count.get((state, action), 0)
+        return self._explore_count_view[self.get_state_action_flat_index(state, action)]
+
+    def increment_state_action_explore_counter(self, state: Tuple[int, int, bool], action: game_definitions.Action, amount: int = 1):
+        player_sum, dealer_value, usable_ace = state
+        self._explore_count_view[
+            ((player_sum * dealer_value_count + dealer_value) * 2 + usable_ace) * len(actions) + action_indices[action]
+        ] += amount
 
-    def increment_state_action_explore_counter(self, state: Tuple[int, int, bool], action: game_definitions.Action):
-        # there might not be any state saved so I use the getter method insted of checking for existance
-        self.state_explore_count[(state, action)] = 1 + self.get_state_action_explore_count(state, action)
\ No newline at end of file
+    def add_explore_counts_at(self, indices: StateActionIndices, counts=1):
+        # repeated indices are accumulated as opposed to plain fancy index assignment
+        np.add.at(self.state_explore_count, indices, counts)
@@ -0,0 +1,55 @@
+import numpy as np
+
+import environment_model
+import game_definitions
+
+
+def test_scalar_accessors_use_the_dense_tables():
+    em = environment_model.EnvironmentModel()
+    state = (17, 10, True)
+    assert em.get_state_action_value(state, game_definitions.Action.HIT) == 0
+    em.set_state_action_value(state, game_definitions.Action.HIT, -.5)
+    em.increment_state_action_visit_counter(state, game_definitions.Action.HIT)
+    em.increment_state_action_explore_counter(state, game_definitions.Action.STAND, 3)
+    assert em.get_state_action_value(state, game_definitions.Action.HIT) == -.5
+    assert em.get_state_action_value(state, game_definitions.Action.STAND) == 0
+    assert em.get_state_action_visit_count(state, game_definitions.Action.HIT) == 1
+    assert em.get_state_action_explore_count(state, game_definitions.Action.STAND) == 3
+    index = em.get_state_action_index(state, game_definitions.Action.HIT)
+    assert em.state_to_value[index] == -.5
+
+
+def test_bulk_accessors_match_scalar_accessors():
+    em = environment_model.EnvironmentModel()
+    player_sums = np.array([12, 12, 20, 21])
+    dealer_values = np.array([2, 2, 11, 10])
+    usable_aces = np.array([False, False, True, False])
+    actions = np.array([
+        game_definitions.Action.HIT.value,
+        game_definitions.Action.HIT.value,
+        game_definitions.Action.STAND.value,
+        game_definitions.Action.HIT.value
+    ])
+    indices = em.get_state_action_indices(player_sums, dealer_values, usable_aces, actions)
+    em.set_values_at(indices, np.array([.1, .2, .3, .4]))
+    em.add_visit_counts_at(indices)
+    assert em.get_state_action_value((12, 2, False), game_definitions.Action.HIT) == .2
+    # repeated indices are counted every time they appear
+    assert em.get_state_action_visit_count((12, 2, False), game_definitions.Action.HIT) == 2
+    assert em.get_state_action_visit_count((20, 11, True), game_definitions.Action.STAND) == 1
+    assert np.allclose(em.get_values_at(indices), [.2, .2, .3, .4])
+    hit_values = em.get_state_action_values(player_sums, dealer_values, usable_aces, game_definitions.Action.HIT)
+    assert np.allclose(hit_values, [.2, .2, 0, .4])
+
+
+def test_update_counts_the_visit_and_follows_replaced_tables():
+    em = environment_model.EnvironmentModel()
+    state = (15, 10, False)
+    assert em.update_state_action_value(state, game_definitions.Action.STAND, 1.0, .1) == .1
+    assert em.state_to_value[15, 10, 0, environment_model.action_indices[game_definitions.Action.STAND]] == .1
+    assert em.get_state_action_visit_count(state, game_definitions.Action.STAND) == 1
+    # the scalar accessors keep working on a table that replaced the original one
+    em.state_to_value = np.full(environment_model.table_shape, .5)
+    assert em.get_state_action_value(state, game_definitions.Action.HIT) == .5
+    em.set_state_action_value(state, game_definitions.Action.HIT, .25)
+    assert em.state_to_value[15, 10, 0, environment_model.action_indices[game_definitions.Action.HIT]] == .25
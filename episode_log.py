@@ -0,0 +1,115 @@
+import json
+import os
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+import game_definitions
+
+format_version = 1
+magic = b"BJEPLOG\0"
+# the header is padded to a fixed size so that the records start at a known offset
+header_size = 256
+record_dtype = np.dtype([("status", np.int8), ("reward", np.float32), ("length", np.uint8)])
+
+
+def _encode_header() -> bytes:
+    header = json.dumps({"format_version": format_version, "record_dtype": record_dtype.descr}).encode()
+    return (magic + header).ljust(header_size, b" ")
+
+
+def _check_header(path: str, header: bytes):
+    if not header.startswith(magic):
+        raise Exception(f"{path} is not an episode log.")
+    fields = json.loads(header[len(magic):].decode())
+    if fields["format_version"] != format_version:
+        raise Exception(f"Unsupported episode log format version {fields['format_version']} in {path}.")
+
+
+class EpisodeLogWriter:
+    """
+    Appends one record of status, reward and length per episode to a binary file,
+    records are gathered in a chunk of chunk_size records that is written out once it is full,
+    so memory does not grow with the number of episodes.
+    Passing keep_episode_count continues an existing log after its first keep_episode_count records, e.g. after a checkpoint
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 16, keep_episode_count: Optional[int] = None):
+        self.path = path
+        self._chunk = np.zeros(chunk_size, dtype=record_dtype)
+        self._chunk_fill = 0
+        if keep_episode_count is not None and os.path.exists(path):
+            self._file = open(path, "r+b")
+            _check_header(path, self._file.read(header_size))
+            kept_size = header_size + keep_episode_count * record_dtype.itemsize
+            if os.path.getsize(path) < kept_size:
+                raise Exception(f"{path} holds fewer than {keep_episode_count} episodes.")
+            self._file.truncate(kept_size)
+            self._file.seek(kept_size)
+            self.written_episode_count = keep_episode_count
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_encode_header())
+            self.written_episode_count = 0
+
+    @property
+    def episode_count(self) -> int:
+        return self.written_episode_count + self._chunk_fill
+
+    def append(self, status: game_definitions.Status, reward: float, length: int):
+        self._chunk[self._chunk_fill] = (status.value, reward, length)
+        self._chunk_fill += 1
+        if self._chunk_fill == len(self._chunk):
+            self.flush()
+
+    def append_batch(self, statuses: np.ndarray, rewards: np.ndarray, lengths: np.ndarray):
+        # takes the values of game_definitions.Status, e.g. as returned by game_logic.play_batch
+        self.flush()
+        records = np.empty(len(statuses), dtype=record_dtype)
+        records["status"] = statuses
+        records["reward"] = rewards
+        records["length"] = lengths
+        self._file.write(records.tobytes())
+        self.written_episode_count += len(records)
+
+    def flush(self):
+        self._file.write(self._chunk[:self._chunk_fill].tobytes())
+        self._file.flush()
+        self.written_episode_count += self._chunk_fill
+        self._chunk_fill = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+
+def read_episode_log(path: str) -> np.ndarray:
+    """ Memory-maps the records of an episode log read-only, pages are loaded only when they are accessed """
+    with open(path, "rb") as log_file:
+        _check_header(path, log_file.read(header_size))
+    episode_count = (os.path.getsize(path) - header_size) // record_dtype.itemsize
+    if episode_count == 0:
+        return np.zeros(0, dtype=record_dtype)
+    return np.memmap(path, dtype=record_dtype, mode="r", offset=header_size, shape=(episode_count,))
+
+
+def iterate_win_ratio_chunks(records: np.ndarray, chunk_size: int = 1 << 20) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields the total win ratio and its standard deviation since the beginning after every episode,
+    chunk_size episodes at a time, they equal RunningStatistics.win_ratio and RunningStatistics.win_ratio_std
+    """
+    win_count = 0
+    for chunk_start in range(0, len(records), chunk_size):
+        wins = records["status"][chunk_start:chunk_start + chunk_size] == game_definitions.Status.PLAYER_WON.value
+        cumulative_win_counts = win_count + np.cumsum(wins)
+        win_count = int(cumulative_win_counts[-1])
+        win_ratios = cumulative_win_counts / np.arange(chunk_start + 1, chunk_start + len(wins) + 1)
+        # the win indicator only takes values 0 and 1 so its variance is p(1 - p)
+        yield win_ratios, np.sqrt(win_ratios * (1 - win_ratios))
@@ -0,0 +1,48 @@
+from game_definitions import Status
+import episode_log
+import running_statistics
+import numpy as np
+
+
+def test_records_survive_chunk_boundaries(tmp_path):
+    path = str(tmp_path / "episodes.eplog")
+    statuses = [Status.PLAYER_WON, Status.DEALER_WON, Status.DRAW] * 5
+    with episode_log.EpisodeLogWriter(path, chunk_size=4) as writer:
+        for episode_no, status in enumerate(statuses):
+            writer.append(status, float(episode_no % 3) - 1, episode_no % 4 + 1)
+        writer.append_batch(np.array([Status.DRAW.value]), np.array([0.]), np.array([2]))
+        assert writer.episode_count == len(statuses) + 1
+    records = episode_log.read_episode_log(path)
+    assert len(records) == len(statuses) + 1
+    assert list(records["status"][:-1]) == [status.value for status in statuses]
+    assert list(records["length"][:4]) == [1, 2, 3, 4]
+    assert records["reward"][-1] == 0
+
+
+def test_continuing_a_log_drops_the_episodes_after_the_checkpoint(tmp_path):
+    path = str(tmp_path / "episodes.eplog")
+    with episode_log.EpisodeLogWriter(path) as writer:
+        for _ in range(10):
+            writer.append(Status.DEALER_WON, -1., 1)
+    with episode_log.EpisodeLogWriter(path, keep_episode_count=6) as writer:
+        writer.append(Status.PLAYER_WON, 1., 2)
+    records = episode_log.read_episode_log(path)
+    assert list(records["status"]) == [Status.DEALER_WON.value] * 6 + [Status.PLAYER_WON.value]
+
+
+def test_win_ratio_chunks_match_running_statistics(tmp_path):
+    np.random.seed(123)
+    path = str(tmp_path / "episodes.eplog")
+    statistics = running_statistics.RunningStatistics(100)
+    win_ratios = []
+    win_ratio_stds = []
+    with episode_log.EpisodeLogWriter(path, chunk_size=64) as writer:
+        for status_value in np.random.choice([status.value for status in Status if status != Status.STILL_PLAYING], 1_000):
+            statistics.update(Status(status_value))
+            writer.append(Status(status_value), 0., 1)
+            win_ratios.append(statistics.win_ratio)
+            win_ratio_stds.append(statistics.win_ratio_std)
+    chunks = list(episode_log.iterate_win_ratio_chunks(episode_log.read_episode_log(path), chunk_size=300))
+    assert len(chunks) == 4
+    assert np.allclose(np.concatenate([chunk for chunk, _ in chunks]), win_ratios)
+    assert np.allclose(np.concatenate([chunk for _, chunk in chunks]), win_ratio_stds)
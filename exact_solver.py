@@ -0,0 +1,77 @@
+from typing import Tuple
+
+import numpy as np
+
+import dealer
+import environment_model
+import game_definitions
+import hand
+
+# only these states are ever decided by the strategies, lower sums always hit
+minimal_decision_player_sum = 12
+
+
+def solve() -> environment_model.EnvironmentModel:
+    """
+    Computes the exact values of hitting and standing for every state by dynamic programming,
+    the player hits whenever their sum does not exceed 11 just like the strategies do
+    and otherwise follows the optimal policy afterwards.
+    Every hit strictly increases the hard total so the states are solved from the highest hard total downwards.
+    """
+    stand_rewards = dealer.get_stand_rewards()
+    hit = environment_model.action_indices[game_definitions.Action.HIT]
+    stand = environment_model.action_indices[game_definitions.Action.STAND]
+    exact_model = environment_model.EnvironmentModel()
+    # the value of following the policy from a given hard total and ace presence, for every dealer value
+    policy_values = {}
+    for hard_total in reversed(range(1, game_definitions.bust_from)):
+        for has_ace in (False, True):
+            player_sum = hand.get_best_total(hard_total, has_ace)
+            usable_ace = player_sum != hard_total
+            hit_values = np.zeros(environment_model.dealer_value_count)
+            for card in game_definitions.Card:
+                next_hard_total = hard_total + hand.card_hard_values[card]
+                if next_hard_total >= game_definitions.bust_from:
+                    hit_values -= dealer.card_probability
+                else:
+                    hit_values += dealer.card_probability * policy_values[(next_hard_total, has_ace or card == game_definitions.Card.ACE)]
+            exact_model.state_to_value[player_sum, :, int(usable_ace), hit] = hit_values
+            exact_model.state_to_value[player_sum, :, int(usable_ace), stand] = stand_rewards[player_sum]
+            if player_sum < minimal_decision_player_sum:
+                policy_values[(hard_total, has_ace)] = hit_values
+            else:
+                policy_values[(hard_total, has_ace)] = np.maximum(hit_values, stand_rewards[player_sum])
+    return exact_model
+
+
+def get_decision_state_mask() -> np.ndarray:
+    """ Marks the (player_sum, dealer_value, usable_ace) states where the strategies actually choose an action """
+    mask = np.zeros(environment_model.table_shape[:3], dtype=bool)
+    dealer_values = sorted({max(values) for values in game_definitions.card_values.values()})
+    mask[minimal_decision_player_sum:game_definitions.bust_from, dealer_values, :] = True
+    return mask
+
+
+def get_value_errors(
+    model: environment_model.EnvironmentModel,
+    exact_model: environment_model.EnvironmentModel
+    ) -> Tuple[float, float]:
+    """ Returns the maximal and the mean absolute error of both action values over the decision states """
+    errors = np.abs(model.state_to_value - exact_model.state_to_value)[get_decision_state_mask()]
+    return float(errors.max()), float(errors.mean())
+
+
+def get_policy_agreement(
+    model: environment_model.EnvironmentModel,
+    exact_model: environment_model.EnvironmentModel
+    ) -> float:
+    """
+    Returns the fraction of decision states where the greedy action of model is the optimal one,
+    states where model cannot tell the actions apart count as disagreements
+    """
+    hit = environment_model.action_indices[game_definitions.Action.HIT]
+    stand = environment_model.action_indices[game_definitions.Action.STAND]
+    mask = get_decision_state_mask()
+    stand_advantage = (model.state_to_value[..., stand] - model.state_to_value[..., hit])[mask]
+    exact_stand_advantage = (exact_model.state_to_value[..., stand] - exact_model.state_to_value[..., hit])[mask]
+    return float(np.mean(np.sign(stand_advantage) == np.sign(exact_stand_advantage)))
@@ -0,0 +1,64 @@
+import numpy as np
+
+import dealer
+import exact_solver
+import game_definitions
+import game_logic
+import hand
+import random_fixed_strategy
+
+
+def test_dealer_final_total_distributions_match_simulation():
+    distributions = dealer.get_final_total_distributions()
+    dealer_values = sorted({max(values) for values in game_definitions.card_values.values()})
+    assert np.allclose(distributions[dealer_values].sum(axis=1), 1)
+    # the dealer never stands below 17
+    assert np.all(distributions[:, :17] == 0)
+
+    np.random.seed(123)
+    simulated_totals = []
+    for _ in range(20_000):
+        dealer_hand = hand.Hand((game_definitions.Card.TEN,))
+        while dealer_hand.best_total < 17:
+            dealer_hand.add(game_logic.distribute_card())
+        simulated_totals.append(min(dealer_hand.best_total, dealer.bust_index))
+    simulated_distribution = np.bincount(simulated_totals, minlength=dealer.bust_index + 1) / 20_000
+    assert np.allclose(simulated_distribution, distributions[10], atol=.015)
+
+
+def test_exact_policy_follows_basic_strategy():
+    exact_model = exact_solver.solve()
+
+    def stands(state):
+        return exact_model.get_state_action_value(state, game_definitions.Action.STAND) > \
+            exact_model.get_state_action_value(state, game_definitions.Action.HIT)
+
+    assert stands((20, 10, False))
+    assert stands((13, 6, False))
+    assert not stands((16, 10, False))
+    assert not stands((12, 2, False))
+    assert not stands((17, 10, True))
+    assert stands((19, 11, True))
+    assert exact_solver.get_policy_agreement(exact_model, exact_model) == 1
+    assert exact_solver.get_value_errors(exact_model, exact_model) == (0, 0)
+
+
+def test_exact_values_match_simulated_returns():
+    exact_model = exact_solver.solve()
+    # playing greedily with respect to the exact values
+    greedy_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=exact_model,
+        default_probability_of_stand=.5
+        )
+    np.random.seed(123)
+    statuses, trajectories = game_logic.play_batch(greedy_strategy, 200_000)
+    rewards = np.select(
+        [statuses == game_definitions.Status.PLAYER_WON.value, statuses == game_definitions.Status.DEALER_WON.value],
+        [1.0, -1.0],
+        0.0
+    )
+    first_states = (trajectories.player_sums[:, 0], trajectories.dealer_values, trajectories.usable_aces[:, 0])
+    expected_rewards = exact_model.get_state_action_values(*first_states, game_definitions.Action.HIT)
+    # every hand starts with a single card and therefore with a hit
+    assert np.all(trajectories.actions[:, 0] == game_definitions.Action.HIT.value)
+    assert abs(np.mean(rewards) - np.mean(expected_rewards)) < .01
@@ -0,0 +1,83 @@
+import numpy as np
+
+from typing import List, Tuple, Union
+
+import strategy
+import hand
+import game_definitions
+import environment_model
+
+# the strategies always hit below this sum
+minimal_stand_player_sum = 12
+
+
+class Frozen_policy_strategy(strategy.Strategy):
+    """
+    A fixed policy compiled into a boolean table indexed by (player_sum, dealer_value, usable_ace) telling whether to stand,
+    it never learns nor draws random numbers
+    """
+
+    def __init__(self, stand_table: np.ndarray):
+        super().__init__()
+        self.stand_table = np.array(stand_table, dtype=bool)
+        self.stand_table.setflags(write=False)
+        # there is nothing to learn so no explorations are counted
+        self.environment_model = None
+
+    @staticmethod
+    def compile(
+        envmodel: environment_model.EnvironmentModel,
+        stand_on_ties: bool = False
+        ) -> "Frozen_policy_strategy":
+        # greedy with respect to envmodel, ties are broken deterministically
+        hit_values = envmodel.state_to_value[..., environment_model.action_indices[game_definitions.Action.HIT]]
+        stand_values = envmodel.state_to_value[..., environment_model.action_indices[game_definitions.Action.STAND]]
+        stand_table = (stand_values > hit_values) | (stand_on_ties & (stand_values == hit_values))
+        # it is always disadvantageous for the player to stand when their deck score does not exceed 11
+        stand_table[:minimal_stand_player_sum] = False
+        return Frozen_policy_strategy(stand_table)
+
+    def take_action(
+        self,
+        player_deck: Union[hand.Hand, List[game_definitions.Card]],
+        dealer_card: game_definitions.Card
+        ) -> game_definitions.Action:
+        player_sum, dealer_value, usable_ace = environment_model.EnvironmentModel.convert_to_state(player_deck, dealer_card)
+        if self.stand_table[player_sum, dealer_value, int(usable_ace)]:
+            return game_definitions.Action.STAND
+        return game_definitions.Action.HIT
+
+    def take_actions(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray
+        ) -> np.ndarray:
+        stand = self.stand_table[
+            np.asarray(player_sums, dtype=np.int64),
+            np.asarray(dealer_values, dtype=np.int64),
+            np.asarray(usable_aces, dtype=np.int64)
+        ]
+        return np.where(stand, game_definitions.Action.STAND.value, game_definitions.Action.HIT.value)
+
+    def stand_probabilities(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray
+        ) -> np.ndarray:
+        return self.stand_table[
+            np.asarray(player_sums, dtype=np.int64),
+            np.asarray(dealer_values, dtype=np.int64),
+            np.asarray(usable_aces, dtype=np.int64)
+        ].astype(np.float64)
+
+    def game_finished(
+        self,
+        final_reward: float,
+        player_visited_bare_states: List[Tuple[int, int, game_definitions.Action]],
+        discount_factor: float,
+        learning_rate: float
+        ):
+        # the policy is frozen
+        pass
@@ -0,0 +1,56 @@
+import numpy as np
+
+import card_source
+import environment_model
+import exact_solver
+import frozen_policy_strategy
+import game_definitions
+import game_logic
+import player
+import random_fixed_strategy
+
+
+def test_frozen_policy_matches_greedy_strategy():
+    exact_model = exact_solver.solve()
+    frozen_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(exact_model)
+    greedy_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=exact_model,
+        default_probability_of_stand=.5
+        )
+    player_sums, dealer_values, usable_aces = np.meshgrid(
+        np.arange(2, game_definitions.bust_from),
+        np.arange(2, environment_model.dealer_value_count),
+        [False, True],
+        indexing="ij"
+    )
+    player_sums, dealer_values, usable_aces = player_sums.ravel(), dealer_values.ravel(), usable_aces.ravel()
+    assert np.array_equal(
+        frozen_strategy.take_actions(player_sums, dealer_values, usable_aces),
+        greedy_strategy.take_actions(player_sums, dealer_values, usable_aces)
+    )
+    player_deck = [game_definitions.Card.TEN, game_definitions.Card.SIX]
+    assert frozen_strategy.take_action(player_deck, game_definitions.Card.SIX) == game_definitions.Action.STAND
+    assert frozen_strategy.take_action(player_deck, game_definitions.Card.ACE) == game_definitions.Action.HIT
+
+
+def test_frozen_policy_breaks_ties_deterministically():
+    em = environment_model.EnvironmentModel()
+    hitting_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(em)
+    standing_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(em, stand_on_ties=True)
+    player_sums = np.array([5, 11, 12, 21])
+    dealer_values = np.array([10, 10, 10, 10])
+    usable_aces = np.array([False, True, False, True])
+    hit, stand = game_definitions.Action.HIT.value, game_definitions.Action.STAND.value
+    assert list(hitting_strategy.take_actions(player_sums, dealer_values, usable_aces)) == [hit, hit, hit, hit]
+    assert list(standing_strategy.take_actions(player_sums, dealer_values, usable_aces)) == [hit, hit, stand, stand]
+
+
+def test_frozen_policy_can_be_played():
+    frozen_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(exact_solver.solve())
+    source = card_source.CardSource(seed=123)
+    player_instance = player.Player(strategy=frozen_strategy)
+    for _ in range(100):
+        game_status, player_visited_bare_states = game_logic.play(player_instance, source)
+        player_instance.end_game(game_logic.get_player_reward(game_status), player_visited_bare_states, 1.0, .1)
+    statuses, _ = game_logic.play_batch(frozen_strategy, 100, source)
+    assert statuses.shape == (100,)
@@ -21,6 +21,10 @@ class Action(Enum):
     HIT = auto()
     STAND = auto()
 
+    # members compare by identity, so hashing by identity is consistent and far cheaper than Enum hashing the name,
+    # which matters since actions are looked up in dictionaries on every step
+    __hash__ = object.__hash__
+
 
 card_values = {
     Card.TWO: [2],
@@ -47,3 +51,12 @@ class Status(Enum):
     DEALER_WON = auto()
     DRAW = auto()
     STILL_PLAYING = auto()
+
+
+class DealerResolution(Enum):
+    # the dealer draws card by card
+    SIMULATE = auto()
+    # the final dealer total is sampled in one draw from dealer.get_final_total_distributions(), infinite deck only
+    SAMPLE = auto()
+    # like SAMPLE, but learning uses the exact expected reward of the final stand, see game_logic.get_learning_reward()
+    EXPECTED = auto()
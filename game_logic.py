@@ -1,11 +1,13 @@
 import numpy as np
 from enum import Enum, auto
-from typing import List
+from typing import Callable, List, NamedTuple, Optional, Tuple
 
 import player
 import dealer
 import game_definitions
 import environment_model
+import hand
+import card_source
 
 
 def evaluate_deck_values(deck_of_cards: List[game_definitions.Card]) -> List[int]:
@@ -49,61 +51,189 @@ def evaluate_nonbusting_deck_values(deck_of_cards: List[game_definitions.Card])
         return list(possible_scores)
 
 
+# per-card lookup tables indexed by the position of the card in game_definitions.Card
+# an ace is counted as its smallest value and may later be promoted by hand.soft_ace_bonus
+cards = card_source.cards
+card_hard_values = np.array([hand.card_hard_values[card] for card in cards])
+card_maximal_values = np.array([max(game_definitions.card_values[card]) for card in cards])
+card_is_ace = np.array([card == game_definitions.Card.ACE for card in cards])
+
+
 def distribute_card():
     # we assume the deck is infinite
     return np.random.choice(game_definitions.Card)
 
 
-def play(player_instance: player.Player) -> game_definitions.Status:
-    def is_deck_busted(deck: List[game_definitions.Card]):
-        return len(evaluate_nonbusting_deck_values(deck)) == 0
+def _get_card_drawer(card_source: Optional[card_source.CardSource]):
+    # cards come from the global numpy random state unless a card source is given
+    if card_source is None:
+        return distribute_card
+    # a finite shoe may get reshuffled between rounds
+    card_source.begin_round()
+    return card_source.draw_card
 
-    # get a card for the dealer
-    dealer_deck = [distribute_card()]
-    dealers_visible_card = dealer_deck[-1]
-    player_deck = [distribute_card()]
-    player_visited_bare_states = []
+
+def _draw_random(card_source: Optional[card_source.CardSource]) -> float:
+    if card_source is None:
+        return np.random.random()
+    if not card_source.is_infinite:
+        raise Exception("Sampling the dealer outcome is only valid for the infinite deck.")
+    return card_source.random()
+
+
+# receives every (state, action) step of the player right after the action is chosen
+StepCallback = Callable[[Tuple[Tuple[int, int, bool], game_definitions.Action]], None]
+
+
+def _play_player_hand(
+    player_instance: player.Player,
+    dealers_visible_card: game_definitions.Card,
+    draw_card,
+    step_callback: Optional[StepCallback] = None
+    ):
+    player_hand = hand.Hand((draw_card(),))
+    # with a step callback every step is handed over as soon as the action is taken instead of being collected
+    player_visited_bare_states = [] if step_callback is None else ()
+    record_step = player_visited_bare_states.append if step_callback is None else step_callback
+    # strategies that do not learn have no environment model to count explorations in
+    player_environment_model = player_instance.strategy.environment_model
+    # some environment models encode more than the hands, e.g. the count of a finite shoe
+    convert_to_state = environment_model.EnvironmentModel.convert_to_state \
+        if player_environment_model is None else player_environment_model.convert_to_state
     # successively distribute cards to the player until they hit or bust
     player_deck_busted = False
-    while (player_action := player_instance.get_action(player_deck, dealers_visible_card)) == game_definitions.Action.HIT:
-        state = environment_model.EnvironmentModel.convert_to_state(player_deck, dealers_visible_card)
-        player_instance.strategy.environment_model.increment_state_action_explore_counter(state, player_action)
-        player_visited_bare_states.append((state, player_action))
-        player_deck.append(distribute_card())
-        if is_deck_busted(player_deck):
+    while (player_action := player_instance.get_action(player_hand, dealers_visible_card)) == game_definitions.Action.HIT:
+        state = convert_to_state(player_hand, dealers_visible_card)
+        if player_environment_model is not None:
+            player_environment_model.increment_state_action_explore_counter(state, player_action)
+        record_step((state, player_action))
+        player_hand.add(draw_card())
+        if player_hand.is_busted:
             player_deck_busted = True
             break
     else:
-        state = environment_model.EnvironmentModel.convert_to_state(player_deck, dealers_visible_card)
-        player_visited_bare_states.append((state, player_action))
-        player_instance.strategy.environment_model.increment_state_action_explore_counter(state, player_action)
+        state = convert_to_state(player_hand, dealers_visible_card)
+        record_step((state, player_action))
+        if player_environment_model is not None:
+            player_environment_model.increment_state_action_explore_counter(state, player_action)
+    return player_hand, player_deck_busted, player_visited_bare_states
+
+
+def _resolve_dealer_hand(
+    dealers_visible_card: game_definitions.Card,
+    draw_card,
+    card_source: Optional[card_source.CardSource],
+    dealer_resolution: game_definitions.DealerResolution
+    ) -> Tuple[int, bool]:
+    # returns the final total of the dealer and whether they busted
+    if dealer_resolution != game_definitions.DealerResolution.SIMULATE:
+        dealer_total = dealer.sample_final_total(
+            max(game_definitions.card_values[dealers_visible_card]),
+            _draw_random(card_source)
+        )
+        return dealer_total, dealer_total == dealer.bust_index
+    # distribute cards to the dealer until they stand or bust
+    dealer_hand = hand.Hand((dealers_visible_card,))
+    while dealer.get_action(dealer_hand) == game_definitions.Action.HIT:
+        dealer_hand.add(draw_card())
+        if dealer_hand.is_busted:
+            return dealer_hand.best_total, True
+    return dealer_hand.best_total, False
+
+
+def _get_status(player_hand: hand.Hand, dealer_total: int, dealer_deck_busted: bool) -> game_definitions.Status:
+    # the player has not busted
+    if dealer_deck_busted:
+        return game_definitions.Status.PLAYER_WON
+    player_minus_dealer_score = player_hand.best_total - dealer_total
+    if player_minus_dealer_score > 0:
+        return game_definitions.Status.PLAYER_WON
+    elif player_minus_dealer_score < 0:
+        return game_definitions.Status.DEALER_WON
+    else:
+        return game_definitions.Status.DRAW
+
+
+def play(
+    player_instance: player.Player,
+    card_source: Optional[card_source.CardSource] = None,
+    dealer_resolution: game_definitions.DealerResolution = game_definitions.DealerResolution.SIMULATE,
+    step_callback: Optional[StepCallback] = None
+    ) -> game_definitions.Status:
+    """
+    Plays one episode and returns its status with the visited (state, action) pairs,
+    which are passed to step_callback one at a time instead when it is given, the returned ones are empty then
+    """
+    draw_card = _get_card_drawer(card_source)
+    # get a card for the dealer
+    dealers_visible_card = draw_card()
+    player_hand, player_deck_busted, player_visited_bare_states = \
+        _play_player_hand(player_instance, dealers_visible_card, draw_card, step_callback)
 
     if player_deck_busted:
         return game_definitions.Status.DEALER_WON, player_visited_bare_states
-    else:
-        # distribute cards to the dealer until they stand or bust
-        dealer_deck_busted = False
-        while dealer.get_action(dealer_deck) == game_definitions.Action.HIT:
-            dealer_deck.append(distribute_card())
-            if is_deck_busted(dealer_deck):
-                dealer_deck_busted = True
-                break
-
-        if dealer_deck_busted:
-            return game_definitions.Status.PLAYER_WON, player_visited_bare_states
-        else:
-            player_values = evaluate_nonbusting_deck_values(
-                player_deck)
-            dealer_values = evaluate_nonbusting_deck_values(
-                dealer_deck)
-            player_minus_dealer_score = max(
-                player_values) - max(dealer_values)
-            if player_minus_dealer_score > 0:
-                return game_definitions.Status.PLAYER_WON, player_visited_bare_states
-            elif player_minus_dealer_score < 0:
-                return game_definitions.Status.DEALER_WON, player_visited_bare_states
-            else:
-                return game_definitions.Status.DRAW, player_visited_bare_states
+    dealer_total, dealer_deck_busted = _resolve_dealer_hand(dealers_visible_card, draw_card, card_source, dealer_resolution)
+    return _get_status(player_hand, dealer_total, dealer_deck_busted), player_visited_bare_states
+
+
+def play_table_round(
+    player_instances: List[player.Player],
+    card_source: Optional[card_source.CardSource] = None,
+    dealer_resolution: game_definitions.DealerResolution = game_definitions.DealerResolution.SIMULATE
+    ) -> List[Tuple[game_definitions.Status, list]]:
+    """
+    Seats every player at one table, they play their hands in turn against the same dealer upcard
+    and a single dealer hand, which is only played if some seat has not busted.
+    Returns (status, player_visited_bare_states) of every seat in the order of player_instances
+    """
+    draw_card = _get_card_drawer(card_source)
+    dealers_visible_card = draw_card()
+    seats = [_play_player_hand(player_instance, dealers_visible_card, draw_card) for player_instance in player_instances]
+    if not all(player_deck_busted for _, player_deck_busted, _ in seats):
+        dealer_total, dealer_deck_busted = _resolve_dealer_hand(dealers_visible_card, draw_card, card_source, dealer_resolution)
+    return [
+        (
+            game_definitions.Status.DEALER_WON if player_deck_busted
+            else _get_status(player_hand, dealer_total, dealer_deck_busted),
+            player_visited_bare_states
+        )
+        for player_hand, player_deck_busted, player_visited_bare_states in seats
+    ]
+
+
+def play_expected_reward(
+    player_instance: player.Player,
+    card_source: Optional[card_source.CardSource] = None
+    ) -> Tuple[float, list]:
+    """
+    Plays the hand of the player only and returns the exact expected reward of the final stand
+    under the infinite deck instead of the reward of a simulated dealer hand, which lowers the variance of learning
+    """
+    if card_source is not None and not card_source.is_infinite:
+        raise Exception("The expected reward of standing is only valid for the infinite deck.")
+    draw_card = _get_card_drawer(card_source)
+    dealers_visible_card = draw_card()
+    _, _, player_visited_bare_states = _play_player_hand(player_instance, dealers_visible_card, draw_card)
+    return get_expected_player_reward(player_visited_bare_states), player_visited_bare_states
+
+
+def get_expected_player_reward(player_visited_bare_states: List[Tuple[Tuple[int, int, bool], game_definitions.Action]]) -> float:
+    # a hand ends either by standing or by busting after a hit
+    (player_sum, dealer_value, *_), action = player_visited_bare_states[-1]
+    if action == game_definitions.Action.HIT:
+        return get_player_reward(game_definitions.Status.DEALER_WON)
+    return float(dealer.get_stand_rewards()[player_sum, dealer_value])
+
+
+def get_learning_reward(
+    status: game_definitions.Status,
+    player_visited_bare_states: List[Tuple[Tuple[int, int, bool], game_definitions.Action]],
+    dealer_resolution: game_definitions.DealerResolution
+    ) -> float:
+    # EXPECTED learns from the exact expected reward of the final stand instead of the reward of the sampled dealer outcome
+    if dealer_resolution == game_definitions.DealerResolution.EXPECTED:
+        return get_expected_player_reward(player_visited_bare_states)
+    return get_player_reward(status)
 
 
 def get_player_reward(status: game_definitions.Status) -> float:
@@ -115,3 +245,214 @@ def get_player_reward(status: game_definitions.Status) -> float:
         return 0.0
     else:
         raise Exception("The game has not yet ended.")
+
+
+# the rewards of game_definitions.Status values for bulk lookups, zero for the ones a game cannot end with
+status_value_to_reward = np.zeros(1 + max(status.value for status in game_definitions.Status), dtype=np.float64)
+for status in (game_definitions.Status.PLAYER_WON, game_definitions.Status.DEALER_WON, game_definitions.Status.DRAW):
+    status_value_to_reward[status.value] = get_player_reward(status)
+
+
+class BatchTrajectories(NamedTuple):
+    """
+    Trajectories of a batch of hands stored column-wise,
+    row i describes hand i and only its first lengths[i] steps are meaningful
+    """
+    player_sums: np.ndarray
+    dealer_values: np.ndarray
+    usable_aces: np.ndarray
+    actions: np.ndarray
+    lengths: np.ndarray
+
+    def get_visited_bare_states(self, hand_index: int) -> List[Tuple[Tuple[int, int, bool], game_definitions.Action]]:
+        # the same format as the one returned by play()
+        dealer_value = int(self.dealer_values[hand_index])
+        return [
+            (
+                (int(player_sum), dealer_value, bool(usable_ace)),
+                game_definitions.Action(int(action))
+            )
+            for player_sum, usable_ace, action in zip(
+                self.player_sums[hand_index, :self.lengths[hand_index]],
+                self.usable_aces[hand_index, :self.lengths[hand_index]],
+                self.actions[hand_index, :self.lengths[hand_index]]
+            )
+        ]
+
+    def get_flat_index_rows(self, envmodel: environment_model.EnvironmentModel) -> List[List[int]]:
+        # the flat table indices of the steps of every hand as plain lists, for environment_model.EnvironmentModel.update_episodes
+        flat_indices = envmodel.get_state_action_flat_indices(
+            self.player_sums, self.dealer_values[:, None], self.usable_aces, self.actions
+        )
+        return [row[:length] for row, length in zip(flat_indices.tolist(), self.lengths.tolist())]
+
+
+def get_learning_rewards(
+    statuses: np.ndarray,
+    trajectories: BatchTrajectories,
+    dealer_resolution: game_definitions.DealerResolution
+    ) -> np.ndarray:
+    # bulk version of get_learning_reward for the values of game_definitions.Status and the trajectories of play_batch()
+    if dealer_resolution != game_definitions.DealerResolution.EXPECTED:
+        return status_value_to_reward[statuses]
+    hand_indices = np.arange(len(statuses))
+    last_steps = trajectories.lengths - 1
+    stood = trajectories.actions[hand_indices, last_steps] == game_definitions.Action.STAND.value
+    stand_rewards = dealer.get_stand_rewards()[
+        trajectories.player_sums[hand_indices, last_steps].astype(np.int64),
+        trajectories.dealer_values
+    ]
+    return np.where(stood, stand_rewards, get_player_reward(game_definitions.Status.DEALER_WON))
+
+
+def evaluate_best_totals(hard_totals: np.ndarray, has_ace: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # at most one ace can ever be promoted without busting
+    usable_aces = has_ace & (hard_totals + hand.soft_ace_bonus < game_definitions.bust_from)
+    return hard_totals + hand.soft_ace_bonus * usable_aces, usable_aces
+
+
+def play_batch(
+    strategy_instance,
+    episode_count: int,
+    card_source: Optional[card_source.CardSource] = None,
+    dealer_resolution: game_definitions.DealerResolution = game_definitions.DealerResolution.SIMULATE
+    ) -> Tuple[np.ndarray, BatchTrajectories]:
+    """
+    Plays episode_count hands in lockstep, every live hand advances one decision at a time
+    and all decisions of a step are taken at once by strategy_instance.take_actions().
+    The environment model is only read while the batch is being played,
+    so learning from the returned trajectories has to happen afterwards.
+    Only the infinite deck is supported, the hands of a finite shoe are dealt in order one round at a time by play().
+    Returns the values of game_definitions.Status for each hand along with the trajectories.
+    """
+    if card_source is not None and not card_source.is_infinite:
+        raise Exception("Lockstep batches deal all hands at once, which is only valid for the infinite deck, play the hands of a shoe one at a time.")
+    hit = game_definitions.Action.HIT.value
+    if card_source is None:
+        def draw_card_indices(count: int) -> np.ndarray:
+            return np.random.randint(len(cards), size=count)
+    else:
+        draw_card_indices = card_source.draw_card_indices
+    dealer_cards = draw_card_indices(episode_count)
+    dealer_values = card_maximal_values[dealer_cards]
+    player_cards = draw_card_indices(episode_count)
+    player_hard_totals = card_hard_values[player_cards]
+    player_has_ace = card_is_ace[player_cards]
+
+    # every hit raises the hard total by at least one, so there are at most bust_from - 1 decisions
+    max_decision_count = game_definitions.bust_from - 1
+    trajectory_player_sums = np.zeros((episode_count, max_decision_count), dtype=np.int8)
+    trajectory_usable_aces = np.zeros((episode_count, max_decision_count), dtype=bool)
+    trajectory_actions = np.zeros((episode_count, max_decision_count), dtype=np.int8)
+    lengths = np.zeros(episode_count, dtype=np.int64)
+    player_busted = np.zeros(episode_count, dtype=bool)
+
+    live_hands = np.arange(episode_count)
+    step = 0
+    while live_hands.size > 0:
+        player_sums, usable_aces = evaluate_best_totals(player_hard_totals[live_hands], player_has_ace[live_hands])
+        actions = strategy_instance.take_actions(player_sums, dealer_values[live_hands], usable_aces)
+        trajectory_player_sums[live_hands, step] = player_sums
+        trajectory_usable_aces[live_hands, step] = usable_aces
+        trajectory_actions[live_hands, step] = actions
+        lengths[live_hands] += 1
+
+        hitting_hands = live_hands[actions == hit]
+        new_cards = draw_card_indices(hitting_hands.size)
+        player_hard_totals[hitting_hands] += card_hard_values[new_cards]
+        player_has_ace[hitting_hands] |= card_is_ace[new_cards]
+        busted = player_hard_totals[hitting_hands] >= game_definitions.bust_from
+        player_busted[hitting_hands] = busted
+        live_hands = hitting_hands[~busted]
+        step += 1
+
+    trajectories = BatchTrajectories(
+        trajectory_player_sums,
+        dealer_values,
+        trajectory_usable_aces,
+        trajectory_actions,
+        lengths
+    )
+    if strategy_instance.environment_model is not None:
+        _count_batch_explorations(strategy_instance.environment_model, trajectories)
+
+    # the dealer only plays against hands that did not bust
+    playing_hands = np.flatnonzero(~player_busted)
+    if dealer_resolution != game_definitions.DealerResolution.SIMULATE:
+        if card_source is None:
+            random_numbers = np.random.random(playing_hands.size)
+        else:
+            random_numbers = card_source.random_array(playing_hands.size)
+        dealer_sums = np.zeros(episode_count, dtype=np.int64)
+        dealer_sums[playing_hands] = dealer.sample_final_totals(dealer_values[playing_hands], random_numbers)
+        dealer_busted = dealer_sums == dealer.bust_index
+    else:
+        dealer_hard_totals = card_hard_values[dealer_cards]
+        dealer_has_ace = card_is_ace[dealer_cards]
+        drawing_hands = playing_hands
+        while drawing_hands.size > 0:
+            dealer_sums, _ = evaluate_best_totals(dealer_hard_totals[drawing_hands], dealer_has_ace[drawing_hands])
+            drawing_hands = drawing_hands[dealer_sums < dealer.stand_from]
+            new_cards = draw_card_indices(drawing_hands.size)
+            dealer_hard_totals[drawing_hands] += card_hard_values[new_cards]
+            dealer_has_ace[drawing_hands] |= card_is_ace[new_cards]
+            drawing_hands = drawing_hands[dealer_hard_totals[drawing_hands] < game_definitions.bust_from]
+        dealer_busted = dealer_hard_totals >= game_definitions.bust_from
+        dealer_sums, _ = evaluate_best_totals(dealer_hard_totals, dealer_has_ace)
+
+    player_sums, _ = evaluate_best_totals(player_hard_totals, player_has_ace)
+    statuses = np.full(episode_count, game_definitions.Status.DRAW.value, dtype=np.int8)
+    statuses[player_sums > dealer_sums] = game_definitions.Status.PLAYER_WON.value
+    statuses[player_sums < dealer_sums] = game_definitions.Status.DEALER_WON.value
+    statuses[dealer_busted] = game_definitions.Status.PLAYER_WON.value
+    statuses[player_busted] = game_definitions.Status.DEALER_WON.value
+    return statuses, trajectories
+
+
+def _count_batch_explorations(envmodel, trajectories: BatchTrajectories):
+    steps = np.arange(trajectories.actions.shape[1]) < trajectories.lengths[:, None]
+    hand_indices = np.nonzero(steps)[0]
+    indices = envmodel.get_state_action_indices(
+        trajectories.player_sums[steps],
+        trajectories.dealer_values[hand_indices],
+        trajectories.usable_aces[steps],
+        trajectories.actions[steps]
+    )
+    envmodel.add_explore_counts_at(indices)
+
+
+def play_episodes(
+    player_instance: player.Player,
+    episode_count: int,
+    episodes_per_batch: int = 1,
+    card_source: Optional[card_source.CardSource] = None,
+    dealer_resolution: game_definitions.DealerResolution = game_definitions.DealerResolution.SIMULATE,
+    step_callback: Optional[StepCallback] = None
+    ):
+    """
+    Yields (status, player_visited_bare_states) for every episode just like play() returns them,
+    when episodes_per_batch exceeds one the episodes are simulated in lockstep batches by play_batch()
+    """
+    if episodes_per_batch <= 1:
+        for _ in range(episode_count):
+            yield play(player_instance, card_source, dealer_resolution, step_callback)
+    elif step_callback is not None:
+        raise Exception("Lockstep batches do not support step callbacks, play the episodes one at a time.")
+    else:
+        for statuses, trajectories in play_batches(
+                player_instance.strategy, episode_count, episodes_per_batch, card_source, dealer_resolution):
+            for hand_index, status in enumerate(statuses):
+                yield game_definitions.Status(int(status)), trajectories.get_visited_bare_states(hand_index)
+
+
+def play_batches(
+    strategy_instance,
+    episode_count: int,
+    episodes_per_batch: int,
+    card_source: Optional[card_source.CardSource] = None,
+    dealer_resolution: game_definitions.DealerResolution = game_definitions.DealerResolution.SIMULATE
+    ):
+    """ Yields play_batch() results for batches of at most episodes_per_batch episodes until episode_count are played """
+    for batch_start in range(0, episode_count, episodes_per_batch):
+        batch_size = min(episodes_per_batch, episode_count - batch_start)
+        yield play_batch(strategy_instance, batch_size, card_source, dealer_resolution)
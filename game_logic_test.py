@@ -1,5 +1,10 @@
-from game_definitions import Card
+from game_definitions import Action, Card, Status
+import game_definitions
 import game_logic
+import environment_model
+import player
+import random_fixed_strategy
+import random_learning_strategy
 import pytest
 import numpy as np
 
@@ -25,4 +30,151 @@ def test_evaluate_deck_values_busting_and_nonbusting(cards, all_values, nonbusti
 def test_card_distribution():
     np.random.seed(123)
     for _ in range(100):
-        assert game_logic.distribute_card() in Card
\ No newline at end of file
+        assert game_logic.distribute_card() in Card
+
+def test_play_batch_trajectories_are_consistent():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=em,
+        probability_of_random_choice=.1,
+        default_probability_of_stand=.5
+        )
+    statuses, trajectories = game_logic.play_batch(learning_strategy, 1000)
+    assert statuses.shape == (1000,)
+    assert set(statuses) <= {status.value for status in Status if status != Status.STILL_PLAYING}
+    for hand_index in range(1000):
+        visited_bare_states = trajectories.get_visited_bare_states(hand_index)
+        # every hand ends either by standing or by busting after a hit
+        assert all(action == Action.HIT for _, action in visited_bare_states[:-1])
+        assert all(2 <= state[0] < game_definitions.bust_from for state, _ in visited_bare_states)
+        if visited_bare_states[-1][1] == Action.STAND:
+            assert visited_bare_states[-1][0][0] > 11
+    explore_count = em.state_explore_count.sum()
+    assert explore_count == trajectories.lengths.sum()
+
+
+@pytest.mark.parametrize("discount_factor", [1.0, .9])
+def test_batch_learning_matches_learning_episode_by_episode(discount_factor):
+    np.random.seed(123)
+    playing_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=environment_model.EnvironmentModel(),
+        probability_of_random_choice=.5,
+        default_probability_of_stand=.5
+        )
+    batch_player = player.Player(random_learning_strategy.Random_learning_strategy(environment_model.EnvironmentModel(), .5, .5))
+    single_player = player.Player(random_learning_strategy.Random_learning_strategy(environment_model.EnvironmentModel(), .5, .5))
+    for _ in range(5):
+        statuses, trajectories = game_logic.play_batch(playing_strategy, 200)
+        final_rewards = game_logic.status_value_to_reward[statuses]
+        batch_player.end_games(final_rewards, trajectories, discount_factor, .1)
+        for hand_index, final_reward in enumerate(final_rewards):
+            single_player.end_game(final_reward, trajectories.get_visited_bare_states(hand_index), discount_factor, .1)
+    # the same floating point operations in the same order
+    assert np.array_equal(batch_player.strategy.environment_model.state_to_value, single_player.strategy.environment_model.state_to_value)
+    assert np.array_equal(
+        batch_player.strategy.environment_model.state_visit_count,
+        single_player.strategy.environment_model.state_visit_count
+    )
+
+
+def test_play_batch_matches_play_outcome_distribution():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=em,
+        default_probability_of_stand=.5
+        )
+    episode_count = 10_000
+    statuses, _ = game_logic.play_batch(fixed_strategy, episode_count)
+    player_instance = player.Player(strategy=fixed_strategy)
+    sequential_statuses = [game_logic.play(player_instance)[0].value for _ in range(episode_count)]
+    for status in (Status.PLAYER_WON, Status.DEALER_WON, Status.DRAW):
+        batch_ratio = np.mean(statuses == status.value)
+        sequential_ratio = np.mean(np.array(sequential_statuses) == status.value)
+        assert abs(batch_ratio - sequential_ratio) < .03
+
+
+def test_sampled_dealer_matches_simulated_dealer():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=em,
+        default_probability_of_stand=.5
+        )
+    episode_count = 20_000
+    simulated_statuses, _ = game_logic.play_batch(fixed_strategy, episode_count)
+    sampled_statuses, _ = game_logic.play_batch(
+        fixed_strategy, episode_count, dealer_resolution=game_definitions.DealerResolution.SAMPLE
+        )
+    player_instance = player.Player(strategy=fixed_strategy)
+    sequential_statuses = np.array([
+        game_logic.play(player_instance, dealer_resolution=game_definitions.DealerResolution.SAMPLE)[0].value
+        for _ in range(episode_count // 2)
+    ])
+    for status in (Status.PLAYER_WON, Status.DEALER_WON, Status.DRAW):
+        simulated_ratio = np.mean(simulated_statuses == status.value)
+        assert abs(np.mean(sampled_statuses == status.value) - simulated_ratio) < .02
+        assert abs(np.mean(sequential_statuses == status.value) - simulated_ratio) < .03
+
+
+def test_expected_reward_matches_simulated_reward():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=em,
+        default_probability_of_stand=.5
+        )
+    player_instance = player.Player(strategy=fixed_strategy)
+    episode_count = 20_000
+    expected_rewards = [game_logic.play_expected_reward(player_instance)[0] for _ in range(episode_count)]
+    simulated_rewards = [game_logic.get_player_reward(game_logic.play(player_instance)[0]) for _ in range(episode_count)]
+    assert all(-1 <= reward <= 1 for reward in expected_rewards)
+    assert abs(np.mean(expected_rewards) - np.mean(simulated_rewards)) < .03
+    # the exact stand reward removes the variance of the dealer hand
+    assert np.var(expected_rewards) < np.var(simulated_rewards)
+
+
+def test_expected_rewards_of_a_batch_match_the_rewards_of_its_episodes():
+    np.random.seed(123)
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=environment_model.EnvironmentModel(),
+        default_probability_of_stand=.5
+        )
+    statuses, trajectories = game_logic.play_batch(
+        fixed_strategy, 2_000, dealer_resolution=game_definitions.DealerResolution.EXPECTED
+    )
+    expected_rewards = game_logic.get_learning_rewards(statuses, trajectories, game_definitions.DealerResolution.EXPECTED)
+    for hand_index, status in enumerate(statuses):
+        assert expected_rewards[hand_index] == game_logic.get_learning_reward(
+            Status(int(status)), trajectories.get_visited_bare_states(hand_index), game_definitions.DealerResolution.EXPECTED
+        )
+    sampled_rewards = game_logic.get_learning_rewards(statuses, trajectories, game_definitions.DealerResolution.SAMPLE)
+    assert np.array_equal(sampled_rewards, game_logic.status_value_to_reward[statuses])
+    # the dealer outcome is still sampled for the statuses, only the learned rewards are exact
+    assert abs(expected_rewards.mean() - sampled_rewards.mean()) < .05
+    assert np.var(expected_rewards) < np.var(sampled_rewards)
+
+
+def test_table_round_seats_share_the_dealer():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=em,
+        default_probability_of_stand=.5
+        )
+    player_instances = [player.Player(strategy=fixed_strategy) for _ in range(3)]
+    round_count = 5_000
+    seat_statuses = []
+    for _ in range(round_count):
+        seats = game_logic.play_table_round(player_instances)
+        assert len(seats) == len(player_instances)
+        # every seat plays against the same upcard
+        assert len({visited_bare_states[0][0][1] for _, visited_bare_states in seats}) == 1
+        seat_statuses.append([status.value for status, _ in seats])
+    seat_statuses = np.array(seat_statuses)
+    sequential_statuses = np.array([game_logic.play(player_instances[0])[0].value for _ in range(round_count)])
+    for status in (Status.PLAYER_WON, Status.DEALER_WON, Status.DRAW):
+        sequential_ratio = np.mean(sequential_statuses == status.value)
+        for seat in range(len(player_instances)):
+            assert abs(np.mean(seat_statuses[:, seat] == status.value) - sequential_ratio) < .04
@@ -0,0 +1,51 @@
+from typing import Iterable, List, Union
+
+import game_definitions
+
+# an ace is counted as its smallest value and at most one ace may be promoted by soft_ace_bonus
+card_hard_values = {card: min(values) for card, values in game_definitions.card_values.items()}
+soft_ace_bonus = max(game_definitions.card_values[game_definitions.Card.ACE]) - \
+    min(game_definitions.card_values[game_definitions.Card.ACE])
+
+
+class Hand:
+    """
+    Incrementally evaluated deck of cards, adding a card costs O(1)
+    as opposed to re-evaluating the whole card list with game_logic.evaluate_nonbusting_deck_values()
+    """
+    __slots__ = ("hard_total", "soft_ace_count")
+
+    def __init__(self, cards: Iterable[game_definitions.Card] = ()):
+        self.hard_total = 0
+        self.soft_ace_count = 0
+        for card in cards:
+            self.add(card)
+
+    def add(self, card: game_definitions.Card):
+        self.hard_total += card_hard_values[card]
+        if card == game_definitions.Card.ACE:
+            self.soft_ace_count += 1
+
+    @property
+    def usable_ace(self) -> bool:
+        return self.soft_ace_count > 0 and self.hard_total + soft_ace_bonus < game_definitions.bust_from
+
+    @property
+    def best_total(self) -> int:
+        # the maximal nonbusting value, or the hard total when the hand is busted
+        return self.hard_total + soft_ace_bonus if self.usable_ace else self.hard_total
+
+    @property
+    def is_busted(self) -> bool:
+        return self.hard_total >= game_definitions.bust_from
+
+
+def get_best_total(hard_total: int, has_ace: bool) -> int:
+    # the same as Hand.best_total for a hand summarized by its hard total and whether it holds an ace
+    usable_ace = has_ace and hard_total + soft_ace_bonus < game_definitions.bust_from
+    return hard_total + soft_ace_bonus if usable_ace else hard_total
+
+
+def as_hand(deck: Union[Hand, List[game_definitions.Card]]) -> Hand:
+    # list based decks are still accepted so that the reference path remains usable
+    return deck if isinstance(deck, Hand) else Hand(deck)
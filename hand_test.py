@@ -0,0 +1,50 @@
+from game_definitions import Card
+import game_definitions
+import game_logic
+import environment_model
+import hand
+import pytest
+import numpy as np
+
+
+@pytest.mark.parametrize("cards", [
+    [Card.JACK, Card.ACE],
+    [Card.ACE, Card.ACE],
+    [Card.ACE, Card.ACE, Card.ACE, Card.ACE],
+    [Card.QUEEN, Card.KING, Card.TWO],
+    [Card.JACK, Card.QUEEN, Card.ACE],
+    [Card.JACK, Card.ACE, Card.ACE],
+    [],
+    [Card.SEVEN, Card.SEVEN, Card.SEVEN],
+    [Card.SEVEN, Card.SEVEN, Card.EIGHT],
+    [Card.TWO],
+])
+def test_hand_matches_reference_evaluation(cards):
+    player_hand = hand.Hand(cards)
+    nonbusting_values = game_logic.evaluate_nonbusting_deck_values(cards)
+    assert player_hand.is_busted == (len(nonbusting_values) == 0)
+    if not player_hand.is_busted:
+        assert player_hand.best_total == max(nonbusting_values)
+        assert player_hand.usable_ace == (len(nonbusting_values) > 1)
+
+
+def test_incremental_hand_matches_reference_evaluation_on_random_decks():
+    np.random.seed(123)
+    for _ in range(1000):
+        player_hand = hand.Hand()
+        cards = []
+        while not player_hand.is_busted:
+            card = game_logic.distribute_card()
+            cards.append(card)
+            player_hand.add(card)
+            nonbusting_values = game_logic.evaluate_nonbusting_deck_values(cards)
+            if nonbusting_values:
+                dealer_card = game_logic.distribute_card()
+                reference_state = (
+                    max(nonbusting_values),
+                    max(game_definitions.card_values[dealer_card]),
+                    len(nonbusting_values) > 1
+                )
+                assert reference_state == environment_model.EnvironmentModel.convert_to_state(player_hand, dealer_card)
+            else:
+                assert player_hand.is_busted
@@ -1,111 +1,282 @@
 import numpy as np
 
+import os
+import time
 import typing
 
 import game_definitions
 import game_logic
 import player
 import dealer
-import visualization
 import random_learning_strategy
 import random_fixed_strategy
 import environment_model
+import running_statistics
+import exact_solver
+import card_source
+import checkpoint
+import policy_export
+import profiling
+import episode_log
+import convergence
+import replay_buffer
 
 
 if __name__ == "__main__":
     # reinforcement learning parameters
     episode_count_list = [100_000]
     print_status_every_n_episodes = 10_000
+    # hands simulated in lockstep by game_logic.play_batch, 1 plays every hand separately with game_logic.play, which a shoe.Shoe needs
+    episodes_per_batch = 1_000
     # also known as gamma
     discount_factor = 1.0
+    # SAMPLE draws the final dealer total from its exact distribution in one step instead of dealing the dealer hand,
+    # EXPECTED additionally learns from the exact expected reward of standing, both need the infinite deck
+    dealer_resolution = game_definitions.DealerResolution.SIMULATE
     learning_rate = 0.1
     random_seed = 123
     latest_entry_count_for_summary = 10_000_000
-    show_plots_in_browser_tab = True
+    # the outcome of every episode is appended to a binary log in episode_log_directory, memory stays constant however long the run is
+    episode_log_directory = "episode_logs"
+    # the downsampled training curves of every configuration are computed from its episode log
+    # and written into plots_directory as self-contained HTML files
+    save_training_curves = True
+    plots_directory = "plots"
+    # strategy heatmaps taken at every status print are rendered in the background into plots_directory
+    save_strategy_heatmaps = True
     probability_of_random_choice_list = [0.1]
     default_probability_of_stand = .5
+    # start learning from the exact solution of the game instead of an all-zero table
+    warm_start_from_exact_solution = False
+    # stop training once the greedy policy agrees with the optimal one on this fraction of states, None never stops early
+    target_policy_agreement = None
+    # stop training once the action values and the greedy policy stay put between status prints for convergence_patience prints
+    stop_when_converged = False
+    convergence_max_value_change_threshold = 0.01
+    convergence_policy_flip_count_threshold = 0
+    # None does not wait for the confidence interval of the total win ratio to narrow down
+    convergence_win_ratio_interval_half_width_threshold = None
+    convergence_patience = 3
+    # every configuration is checkpointed into this directory, None disables checkpoints
+    checkpoint_directory = None
+    checkpoint_every_n_seconds = 5
+    # continue every configuration from its checkpoint if there is one
+    resume_from_checkpoint = True
+    # the learned value table of every configuration is exported there for policy_export.load_read_only_model, None disables it
+    value_table_directory = None
+    # transitions are stored in a replay buffer of this capacity and learned from in minibatches, None learns after every episode
+    replay_buffer_capacity = None
+    replay_sampling_method = replay_buffer.SamplingMethod.FIFO
+    replay_minibatch_size = 4_096
+    learn_from_replay_every_n_episodes = 1_000
+    # wall time histograms of the phases of the episode loop, printed with the status and dumped into profile_report_path
+    profile_phases = False
+    profile_report_path = "profile.json"
 
-    np.random.seed(random_seed)
+    player_card_source = card_source.CardSource(random_seed)
+    profiler = profiling.PhaseProfiler(enabled=profile_phases)
+    profiler.instrument(player_card_source, "draw_card", "card dealing")
+    profiler.instrument(player_card_source, "draw_card_indices", "card dealing")
+    exact_environment_model = exact_solver.solve()
 
     for episode_count in episode_count_list:
         for probability_of_random_choice in probability_of_random_choice_list:
             export_plot_name = f"discount_factor-{discount_factor},episodes-{episode_count},seed-{random_seed}"
+            # checkpoints and episode logs leave the episode count out so that a run can be extended by raising it
+            configuration_name = f"discount_factor-{discount_factor},seed-{random_seed},probability_of_random_choice-{probability_of_random_choice}"
 
             # initial setup
-            player_environment_model = environment_model.EnvironmentModel()
+            player_environment_model = exact_solver.solve() if warm_start_from_exact_solution else environment_model.EnvironmentModel()
             player_fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
                 environment_model=player_environment_model,
-                default_probability_of_stand=default_probability_of_stand
+                default_probability_of_stand=default_probability_of_stand,
+                random_source=player_card_source
                 )
             player_learning_strategy = random_learning_strategy.Random_learning_strategy(
                 environment_model=player_environment_model,
                 probability_of_random_choice=probability_of_random_choice,
-                default_probability_of_stand=default_probability_of_stand
+                default_probability_of_stand=default_probability_of_stand,
+                random_source=player_card_source
                 )
                 
             player_instance = player.Player(strategy=player_learning_strategy)
-            dealer_win_count = 0
-            player_win_count = 0
-            player_win_history = []
-            player_win_history_average = [0]
-            player_win_history_std = []
-            # total_player_win_average = 0
-            draw_count = 0
-
-            # playing blackjack games with fixed strategy
-            for episode_no in range(episode_count):
-                # 1/(1 + episode_no) #probability_of_random_choice
-                player_instance.probability_of_random_choice = probability_of_random_choice
-                game_status, player_visited_bare_states = game_logic.play(player_instance)
-                player_final_reward = game_logic.get_player_reward(game_status)
-                player_instance.end_game(
-                    player_final_reward,
-                    player_visited_bare_states,
-                    discount_factor,
-                    learning_rate
+            profiler.instrument(player_instance, "get_action", "player decisions")
+            profiler.instrument(player_learning_strategy, "take_actions", "player decisions")
+            convergence_monitor = None
+            if stop_when_converged:
+                convergence_monitor = convergence.ConvergenceMonitor(
+                    max_value_change_threshold=convergence_max_value_change_threshold,
+                    policy_flip_count_threshold=convergence_policy_flip_count_threshold,
+                    win_ratio_interval_half_width_threshold=convergence_win_ratio_interval_half_width_threshold,
+                    patience=convergence_patience
                     )
+            replay_learner = None
+            if replay_buffer_capacity is not None:
+                replay_learner = replay_buffer.ReplayLearner(
+                    player_environment_model,
+                    replay_buffer.ReplayBuffer(replay_buffer_capacity),
+                    learning_rate,
+                    replay_minibatch_size,
+                    replay_sampling_method,
+                    player_card_source
+                    )
+            player_statistics = running_statistics.RunningStatistics(latest_entry_count_for_summary)
+            heatmap_writer = None
+            if save_strategy_heatmaps:
+                # plotly is only imported when something is plotted
+                import visualization
+                heatmap_writer = visualization.HeatmapSnapshotWriter(
+                    plots_directory,
+                    f"strategy-{export_plot_name},probability_of_random_choice-{probability_of_random_choice}"
+                )
 
-                # game ended, check who has won the game
-                if game_status == game_definitions.Status.DEALER_WON:
-                    dealer_win_count += 1
-                    player_win_history.append(0)
-
-                    last_element = player_win_history_average[-1]
-                    n = len(player_win_history_average)
-                    player_win_history_average.append(
-                        last_element + (0-last_element)/n)
-                    # total_player_win_average += (0-total_player_win_average)/n
-                elif game_status == game_definitions.Status.PLAYER_WON:
-                    player_win_count += 1
-                    player_win_history.append(1)
-
-                    last_element = player_win_history_average[-1]
-                    n = len(player_win_history_average)
-                    player_win_history_average.append(
-                        last_element + (1-last_element)/n)
-                    # total_player_win_average += (1-total_player_win_average)/n
-                elif game_status == game_definitions.Status.DRAW:
-                    draw_count += 1
+            checkpoint_path = None
+            resumed_episode_count = 0
+            if checkpoint_directory is not None:
+                checkpoint_path = os.path.join(checkpoint_directory, f"{configuration_name}.npz")
+                if resume_from_checkpoint and os.path.exists(checkpoint_path):
+                    resumed_episode_count = checkpoint.restore_checkpoint(
+                        checkpoint_path,
+                        player_environment_model,
+                        player_card_source,
+                        player_statistics,
+                        replay_learner.buffer if replay_learner is not None else None
+                        )
+                    print(f"Resumed from {checkpoint_path} after {resumed_episode_count} episodes")
+            last_checkpoint_time = time.monotonic()
+
+            os.makedirs(episode_log_directory, exist_ok=True)
+            episode_log_path = os.path.join(episode_log_directory, f"{configuration_name}.eplog")
+            # a resumed configuration continues its log right after the checkpointed episodes,
+            # the writer is closed even if training fails so that no finished episode is lost
+            with episode_log.EpisodeLogWriter(
+                episode_log_path,
+                keep_episode_count=resumed_episode_count if resumed_episode_count > 0 else None
+                ) as episode_log_writer:
+                # playing blackjack games with fixed strategy
+                # every chunk is a lockstep batch learned from as a whole, or a single episode when episodes_per_batch is 1
+                remaining_episode_count = episode_count - resumed_episode_count
+                if episodes_per_batch > 1:
+                    chunks = game_logic.play_batches(
+                        player_learning_strategy,
+                        remaining_episode_count,
+                        episodes_per_batch,
+                        player_card_source,
+                        dealer_resolution
+                        )
                 else:
-                    raise Exception(f"Unexpected game state: {game_status}")
-
-                latest_history = player_win_history
-                # latest_history = player_win_history_average[-latest_entry_count_for_summary:]
-                latest_ratio_average = np.average(latest_history)
-                latest_ratio_std = np.std(latest_history)
-                player_win_history_std.append(latest_ratio_std)
-
-                # printing all lines at once in order to avoid console text flickering
-                messages = [
-                    f"Latest {latest_entry_count_for_summary} games summary: average player wins/dealer wins: {latest_ratio_average: .5f} standard deviation: {latest_ratio_std: .3E}",
-                    f"Completed episodes {episode_no + 1} out of {episode_count}",
-                    str(len(player_environment_model.state_to_value))
-                    # f"Total statistics: average player wins/dealer wins: {total_player_win_average: .5f}"
-                ]
-
-                if (episode_no+1) % print_status_every_n_episodes == 0:
-                    print("\n".join(messages))
-                    visualization.draw_strategy_heatmap(player_environment_model)
+                    chunks = game_logic.play_episodes(player_instance, remaining_episode_count, 1, player_card_source, dealer_resolution)
+                chunks = profiler.time_iterator("playing episodes", chunks)
+                completed_episode_count = resumed_episode_count
+                for chunk in chunks:
+                    previous_completed_episode_count = completed_episode_count
+                    # 1/(1 + episode_no) #probability_of_random_choice
+                    player_instance.probability_of_random_choice = probability_of_random_choice
+                    if episodes_per_batch > 1:
+                        statuses, trajectories = chunk
+                        player_final_rewards = game_logic.get_learning_rewards(statuses, trajectories, dealer_resolution)
+                        with profiler.phase("learning"):
+                            if replay_learner is None:
+                                player_instance.end_games(player_final_rewards, trajectories, discount_factor, learning_rate)
+                            else:
+                                replay_learner.buffer.add_batch(player_final_rewards, trajectories, discount_factor)
+                        # game ended, check who has won the game
+                        with profiler.phase("statistics"):
+                            player_statistics.update_batch(statuses)
+                            episode_log_writer.append_batch(statuses, player_final_rewards, trajectories.lengths)
+                        completed_episode_count += len(statuses)
+                    else:
+                        game_status, player_visited_bare_states = chunk
+                        player_final_reward = game_logic.get_learning_reward(game_status, player_visited_bare_states, dealer_resolution)
+                        with profiler.phase("learning"):
+                            if replay_learner is None:
+                                player_instance.end_game(
+                                    player_final_reward,
+                                    player_visited_bare_states,
+                                    discount_factor,
+                                    learning_rate
+                                    )
+                            else:
+                                replay_learner.buffer.add_episode(player_final_reward, player_visited_bare_states, discount_factor)
+                        # game ended, check who has won the game
+                        with profiler.phase("statistics"):
+                            player_statistics.update(game_status)
+                            episode_log_writer.append(game_status, player_final_reward, len(player_visited_bare_states))
+                        completed_episode_count += 1
+
+                    if replay_learner is not None and completed_episode_count // learn_from_replay_every_n_episodes \
+                            > previous_completed_episode_count // learn_from_replay_every_n_episodes:
+                        with profiler.phase("learning"):
+                            replay_learner.learn(-(-len(replay_learner.buffer) // replay_minibatch_size))
+
+                    # checkpoints are only taken between chunks so that no hand is dealt but left unplayed
+                    if checkpoint_path is not None and time.monotonic() - last_checkpoint_time >= checkpoint_every_n_seconds:
+                        with profiler.phase("checkpoints"):
+                            # the log may run ahead of the checkpoint but never behind it
+                            episode_log_writer.flush()
+                            checkpoint.save_checkpoint(
+                                checkpoint_path,
+                                player_environment_model,
+                                player_card_source,
+                                player_statistics,
+                                completed_episode_count,
+                                replay_learner.buffer if replay_learner is not None else None
+                                )
+                        last_checkpoint_time = time.monotonic()
+
+                    if completed_episode_count // print_status_every_n_episodes > previous_completed_episode_count // print_status_every_n_episodes:
+                        with profiler.phase("comparison with the exact solution"):
+                            policy_agreement = exact_solver.get_policy_agreement(player_environment_model, exact_environment_model)
+                            maximal_value_error, mean_value_error = exact_solver.get_value_errors(player_environment_model, exact_environment_model)
+                        # printing all lines at once in order to avoid console text flickering
+                        messages = [
+                            f"Latest {latest_entry_count_for_summary} games summary: average player wins: {player_statistics.latest_win_ratio: .5f} standard deviation: {player_statistics.latest_win_ratio_std: .3E} draws: {player_statistics.latest_draw_ratio: .5f}",
+                            f"Total statistics: average player wins: {player_statistics.win_ratio: .5f} draws: {player_statistics.draw_ratio: .5f}",
+                            f"Completed episodes {completed_episode_count} out of {episode_count}",
+                            f"Learned state-action pairs: {np.count_nonzero(player_environment_model.state_visit_count)}",
+                            f"Agreement with the optimal policy: {policy_agreement: .5f} maximal value error: {maximal_value_error: .5f} mean value error: {mean_value_error: .5f}"
+                        ]
+                        if convergence_monitor is not None:
+                            convergence_monitor.update(player_environment_model, player_statistics)
+                            messages.append(convergence_monitor.format_status())
+                        messages += profiler.format_report()
+                        print("\n".join(messages))
+                        if heatmap_writer is not None:
+                            with profiler.phase("visualization"):
+                                heatmap_writer.submit(player_environment_model, completed_episode_count)
+                        if target_policy_agreement is not None and policy_agreement >= target_policy_agreement:
+                            print(f"Reached the target policy agreement after {completed_episode_count} episodes")
+                            break
+                        if convergence_monitor is not None and convergence_monitor.has_converged:
+                            print(f"Converged after {completed_episode_count} episodes: {convergence_monitor.get_stop_reason()}")
+                            break
+
+                # the episodes played since the last replay learning are learned from too
+                if replay_learner is not None and completed_episode_count % learn_from_replay_every_n_episodes != 0:
+                    with profiler.phase("learning"):
+                        replay_learner.learn(-(-len(replay_learner.buffer) // replay_minibatch_size))
+
+                # the loop only stops between chunks, so the final checkpoint never splits a batch either
+                if checkpoint_path is not None:
+                    # the log may run ahead of the checkpoint but never behind it
+                    episode_log_writer.flush()
+                    checkpoint.save_checkpoint(
+                        checkpoint_path,
+                        player_environment_model,
+                        player_card_source,
+                        player_statistics,
+                        completed_episode_count,
+                        replay_learner.buffer if replay_learner is not None else None
+                        )
+
+            if value_table_directory is not None:
+                policy_export.export_value_table(
+                    player_environment_model,
+                    os.path.join(
+                        value_table_directory,
+                        f"{export_plot_name},probability_of_random_choice-{probability_of_random_choice}.npy"
+                    )
+                    )
 
             # print("Learning from fixed strategy")
 
@@ -152,7 +323,7 @@ if __name__ == "__main__":
             #     messages = [
             #         f"Latest {latest_entry_count_for_summary} games summary: average player wins/dealer wins: {latest_ratio_average: .5f} standard deviation: {latest_ratio_std: .3E}",
             #         f"Completed episodes {episode_no + 1} out of {episode_count}",
-            #         str(len(player_environment_model.state_to_value))
+            #         f"Learned state-action pairs: {np.count_nonzero(player_environment_model.state_visit_count)}"
             #         # f"Total statistics: average player wins/dealer wins: {total_player_win_average: .5f}"
             #     ]
 
@@ -162,10 +333,21 @@ if __name__ == "__main__":
 
 
 
-            if show_plots_in_browser_tab:
-                visualization.draw_figure(
-                    player_win_history,
-                    player_win_history_average,
-                    player_win_history_std,
-                    episode_count
-                    )
+            if heatmap_writer is not None:
+                heatmap_writer.close()
+
+            if save_training_curves:
+                with profiler.phase("visualization"):
+                    import visualization
+                    os.makedirs(plots_directory, exist_ok=True)
+                    visualization.draw_episode_log_figure(
+                        episode_log_path,
+                        os.path.join(
+                            plots_directory,
+                            f"{export_plot_name},probability_of_random_choice-{probability_of_random_choice}.html"
+                        )
+                        )
+
+    if profile_phases:
+        print("\n".join(profiler.format_report()))
+        profiler.dump_json(profile_report_path)
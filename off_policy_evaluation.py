@@ -0,0 +1,93 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+import card_source
+import game_definitions
+import game_logic
+import strategy
+
+
+class LoggedEpisodes(NamedTuple):
+    """
+    Episodes played by a behaviour strategy together with the probability it had of taking every logged action,
+    the probabilities beyond the length of an episode are 1
+    """
+    rewards: np.ndarray
+    trajectories: game_logic.BatchTrajectories
+    behaviour_action_probabilities: np.ndarray
+
+
+class PolicyValueEstimate(NamedTuple):
+    value: float
+    standard_error: float
+    lower_bound: float
+    upper_bound: float
+    # the number of equally weighted episodes that would give an estimate as precise
+    effective_sample_size: float
+
+
+def get_action_probabilities(strategy_instance: strategy.Strategy, trajectories: game_logic.BatchTrajectories) -> np.ndarray:
+    """ Returns the probability of strategy_instance taking every logged action, 1 beyond the length of an episode """
+    played = np.arange(trajectories.actions.shape[1]) < trajectories.lengths[:, None]
+    stand_probabilities = strategy_instance.stand_probabilities(
+        trajectories.player_sums[played],
+        np.broadcast_to(trajectories.dealer_values[:, None], played.shape)[played],
+        trajectories.usable_aces[played]
+    )
+    action_probabilities = np.ones(played.shape)
+    action_probabilities[played] = np.where(
+        trajectories.actions[played] == game_definitions.Action.STAND.value,
+        stand_probabilities,
+        1 - stand_probabilities
+    )
+    return action_probabilities
+
+
+def log_episodes(
+    behaviour_strategy: strategy.Strategy,
+    episode_count: int,
+    card_source: Optional[card_source.CardSource] = None
+    ) -> LoggedEpisodes:
+    statuses, trajectories = game_logic.play_batch(behaviour_strategy, episode_count, card_source)
+    # play_batch does not learn, so the probabilities are the ones the actions were drawn with
+    return LoggedEpisodes(
+        game_logic.status_value_to_reward[statuses],
+        trajectories,
+        get_action_probabilities(behaviour_strategy, trajectories)
+    )
+
+
+def estimate_policy_values(
+    logged_episodes: LoggedEpisodes,
+    target_strategies: List[strategy.Strategy],
+    confidence_z_score: float = 1.96
+    ) -> List[PolicyValueEstimate]:
+    """
+    Estimates the expected reward of every target strategy from the same logged episodes with weighted importance sampling,
+    every episode is weighted by the product of the target to behaviour probability ratios of its actions.
+    The standard errors follow from the delta method for the ratio of the weighted reward sum to the weight sum.
+    Target strategies that may take actions the behaviour strategy never takes are estimated with a bias
+    """
+    estimates = []
+    for target_strategy in target_strategies:
+        weights = np.prod(
+            get_action_probabilities(target_strategy, logged_episodes.trajectories)
+            / logged_episodes.behaviour_action_probabilities,
+            axis=1
+        )
+        weight_sum = weights.sum()
+        if weight_sum == 0:
+            # no logged episode could have been played by the target strategy
+            estimates.append(PolicyValueEstimate(np.nan, np.nan, np.nan, np.nan, 0.0))
+            continue
+        value = float(np.dot(weights, logged_episodes.rewards) / weight_sum)
+        standard_error = float(np.sqrt(np.sum((weights * (logged_episodes.rewards - value)) ** 2)) / weight_sum)
+        estimates.append(PolicyValueEstimate(
+            value,
+            standard_error,
+            value - confidence_z_score * standard_error,
+            value + confidence_z_score * standard_error,
+            float(weight_sum ** 2 / np.sum(weights ** 2))
+        ))
+    return estimates
@@ -0,0 +1,49 @@
+import card_source
+import environment_model
+import exact_solver
+import frozen_policy_strategy
+import game_logic
+import off_policy_evaluation
+import random_learning_strategy
+import numpy as np
+
+
+def test_stand_probabilities_match_taken_actions():
+    np.random.seed(123)
+    em = exact_solver.solve()
+    learning_strategy = random_learning_strategy.Random_learning_strategy(em, .3, .4)
+    player_sums = np.repeat(np.array([8, 13, 16, 20]), 50_000)
+    dealer_values = np.full(len(player_sums), 10)
+    usable_aces = np.zeros(len(player_sums), dtype=bool)
+    stand_probabilities = learning_strategy.stand_probabilities(player_sums, dealer_values, usable_aces)
+    stand = learning_strategy.take_actions(player_sums, dealer_values, usable_aces) == off_policy_evaluation.game_definitions.Action.STAND.value
+    for player_sum in (8, 13, 16, 20):
+        mask = player_sums == player_sum
+        assert abs(stand[mask].mean() - stand_probabilities[mask][0]) < .01
+
+
+def test_weighted_importance_sampling_matches_on_policy_values():
+    exact_model = exact_solver.solve()
+    behaviour_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model.EnvironmentModel(),
+        probability_of_random_choice=.5,
+        default_probability_of_stand=.5,
+        random_source=card_source.CardSource(1)
+        )
+    behaviour_strategy.environment_model.state_to_value[:] = exact_model.state_to_value
+    optimal_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(exact_model)
+    # stands from 17 on just like the dealer
+    stand_table = np.zeros(environment_model.table_shape[:3], dtype=bool)
+    stand_table[17:] = True
+    dealer_like_strategy = frozen_policy_strategy.Frozen_policy_strategy(stand_table)
+
+    logged_episodes = off_policy_evaluation.log_episodes(behaviour_strategy, 200_000, card_source.CardSource(2))
+    estimates = off_policy_evaluation.estimate_policy_values(logged_episodes, [optimal_strategy, dealer_like_strategy])
+    for target_strategy, estimate in zip([optimal_strategy, dealer_like_strategy], estimates):
+        statuses, _ = game_logic.play_batch(target_strategy, 200_000, card_source.CardSource(3))
+        rewards = game_logic.status_value_to_reward[statuses]
+        on_policy_standard_error = rewards.std() / np.sqrt(len(rewards))
+        tolerance = 4 * np.hypot(estimate.standard_error, on_policy_standard_error)
+        assert abs(estimate.value - rewards.mean()) < tolerance
+        assert estimate.lower_bound < estimate.value < estimate.upper_bound
+        assert 0 < estimate.effective_sample_size < 200_000
@@ -0,0 +1,96 @@
+import numpy as np
+
+from typing import List, Optional, Tuple
+
+import card_source
+import game_definitions
+import environment_model
+import random_learning_strategy
+
+
+class Online_td_strategy(random_learning_strategy.Random_learning_strategy):
+    """
+    Acts like Random_learning_strategy but learns while playing: passed as the step_callback of game_logic.play,
+    every step moves the action value of the previous step towards the discounted value of the current one,
+    the value of the action taken for SARSA or the greedy one for Q-learning, and game_finished settles the last step.
+    A positive trace_decay (lambda) spreads every update over the earlier steps of the episode with eligibility traces,
+    Q-learning cuts the traces after exploratory actions (Watkins's Q(lambda)).
+    The learning rate and the discount factor are fixed at construction since most updates happen before game_finished
+    """
+
+    def __init__(
+            self,
+            environment_model: environment_model.EnvironmentModel,
+            probability_of_random_choice: float,
+            default_probability_of_stand: float,
+            learning_rate: float,
+            discount_factor: float = 1.0,
+            trace_decay: float = 0.0,
+            q_learning: bool = False,
+            random_source: Optional[card_source.CardSource] = None
+            ):
+        super().__init__(environment_model, probability_of_random_choice, default_probability_of_stand, random_source)
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.trace_decay = trace_decay
+        self.q_learning = q_learning
+        # the traces are dense over the small table so that no episode allocates anything
+        self._eligibility = np.zeros(self.environment_model.state_to_value.shape)
+        self._previous_index = None
+
+    def step(self, visited_bare_state: Tuple[Tuple[int, int, bool], game_definitions.Action]):
+        state, action = visited_bare_state
+        index = self.environment_model.get_state_action_index(state, action)
+        state_values = self.environment_model.state_to_value[index[:-1]]
+        value = state_values[index[-1]]
+        if state[0] <= 11:
+            # standing is never chosen there, so hitting is the greedy action whatever the untouched stand value is
+            greedy_value = state_values[environment_model.action_indices[game_definitions.Action.HIT]]
+        else:
+            greedy_value = state_values.max()
+        if self._previous_index is not None:
+            self._update(self.discount_factor * (greedy_value if self.q_learning else value))
+        if self.q_learning and self.trace_decay > 0 and value < greedy_value:
+            # the following steps do not follow the greedy policy whose values Q-learning estimates
+            self._eligibility.fill(0)
+        self.environment_model.increment_state_action_visit_counter(state, action)
+        self._previous_index = index
+
+    def _update(self, target: float):
+        values = self.environment_model.state_to_value
+        temporal_difference = target - values[self._previous_index]
+        if self.trace_decay == 0:
+            values[self._previous_index] += self.learning_rate * temporal_difference
+        else:
+            self._eligibility[self._previous_index] += 1
+            values += self.learning_rate * temporal_difference * self._eligibility
+            self._eligibility *= self.discount_factor * self.trace_decay
+
+    def game_finished(
+        self,
+        final_reward: float,
+        player_visited_bare_states: List[Tuple[int, int, game_definitions.Action]],
+        discount_factor: float,
+        learning_rate: float
+        ):
+        # the steps were already learned from in step(), only the final one is left,
+        # unless the episode was played without the step callback and its steps are replayed now
+        if self._previous_index is None:
+            for visited_bare_state in player_visited_bare_states:
+                self.step(visited_bare_state)
+        if self._previous_index is not None:
+            self._update(final_reward)
+        self._previous_index = None
+        if self.trace_decay > 0:
+            self._eligibility.fill(0)
+
+    def game_finished_batch(
+        self,
+        final_rewards: np.ndarray,
+        trajectories,
+        discount_factor: float,
+        learning_rate: float
+        ):
+        # the temporal differences depend on the order of the steps, so the hands are replayed one by one
+        for hand_index, final_reward in enumerate(final_rewards.tolist()):
+            self.game_finished(final_reward, trajectories.get_visited_bare_states(hand_index), discount_factor, learning_rate)
@@ -0,0 +1,78 @@
+from game_definitions import Action
+import card_source
+import environment_model
+import exact_solver
+import frozen_policy_strategy
+import game_logic
+import online_td_strategy
+import player
+import pytest
+
+
+def test_sarsa_updates_towards_the_next_action_value():
+    em = environment_model.EnvironmentModel()
+    hit_state, stand_state = (12, 10, False), (19, 10, False)
+    em.set_state_action_value(stand_state, Action.STAND, .5)
+    td_strategy = online_td_strategy.Online_td_strategy(em, .1, .5, learning_rate=.1, discount_factor=.9)
+    td_strategy.step((hit_state, Action.HIT))
+    td_strategy.step((stand_state, Action.STAND))
+    assert em.get_state_action_value(hit_state, Action.HIT) == pytest.approx(.1 * .9 * .5)
+    td_strategy.game_finished(1.0, (), .9, .1)
+    assert em.get_state_action_value(stand_state, Action.STAND) == pytest.approx(.5 + .1 * (1 - .5))
+    assert em.get_state_action_visit_count(hit_state, Action.HIT) == 1
+
+
+def test_eligibility_traces_propagate_the_final_reward():
+    em = environment_model.EnvironmentModel()
+    hit_state, stand_state = (12, 10, False), (19, 10, False)
+    td_strategy = online_td_strategy.Online_td_strategy(em, .1, .5, learning_rate=.1, trace_decay=1.0)
+    td_strategy.step((hit_state, Action.HIT))
+    td_strategy.step((stand_state, Action.STAND))
+    td_strategy.game_finished(1.0, (), 1.0, .1)
+    # with lambda = 1 the first step receives the final reward right away just like the last one
+    assert em.get_state_action_value(hit_state, Action.HIT) == pytest.approx(.1)
+    assert em.get_state_action_value(stand_state, Action.STAND) == pytest.approx(.1)
+
+
+def test_step_callback_receives_the_steps_play_would_return():
+    frozen_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(exact_solver.solve())
+    player_instance = player.Player(strategy=frozen_strategy)
+    for episode_no in range(100):
+        visited_bare_states = game_logic.play(player_instance, card_source.CardSource(episode_no))[1]
+        callback_states = []
+        game_status, returned_states = game_logic.play(
+            player_instance, card_source.CardSource(episode_no), step_callback=callback_states.append
+            )
+        assert callback_states == visited_bare_states
+        assert len(returned_states) == 0
+
+
+def test_online_q_learning_approaches_the_optimal_policy():
+    source = card_source.CardSource(7)
+    em = environment_model.EnvironmentModel()
+    td_strategy = online_td_strategy.Online_td_strategy(
+        em, .2, .5, learning_rate=.05, trace_decay=.8, q_learning=True, random_source=source
+        )
+    player_instance = player.Player(strategy=td_strategy)
+    for game_status, _ in game_logic.play_episodes(player_instance, 30_000, card_source=source, step_callback=td_strategy.step):
+        player_instance.end_game(game_logic.get_player_reward(game_status), (), 1.0, .05)
+    assert exact_solver.get_policy_agreement(em, exact_solver.solve()) > .75
+
+
+def test_q_learning_backs_up_the_hit_value_below_twelve():
+    em = environment_model.EnvironmentModel()
+    em.set_state_action_value((5, 10, False), Action.HIT, -.3)
+    td_strategy = online_td_strategy.Online_td_strategy(em, .1, .5, learning_rate=1.0, q_learning=True)
+    td_strategy.step(((3, 10, False), Action.HIT))
+    td_strategy.step(((5, 10, False), Action.HIT))
+    # the stand value of 0 is never acted upon there and must not be backed up
+    assert em.get_state_action_value((3, 10, False), Action.HIT) == pytest.approx(-.3)
+
+
+def test_episodes_played_without_the_step_callback_are_learned_from():
+    em = environment_model.EnvironmentModel()
+    td_strategy = online_td_strategy.Online_td_strategy(em, .1, .5, learning_rate=.1)
+    visited_bare_states = [((12, 10, False), Action.HIT), ((19, 10, False), Action.STAND)]
+    td_strategy.game_finished(1.0, visited_bare_states, 1.0, .1)
+    assert em.get_state_action_value((19, 10, False), Action.STAND) == pytest.approx(.1)
+    assert em.get_state_action_visit_count((12, 10, False), Action.HIT) == 1
@@ -0,0 +1,103 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+import card_source
+import game_definitions
+import game_logic
+import player
+import strategy
+
+# an episode only needs a few dozen cards and random numbers
+episode_block_size = 32
+
+
+class _Evaluated_strategy(strategy.Strategy):
+    """ Plays like the wrapped strategy but hides its environment model, in which game_logic.play would count explorations """
+
+    def __init__(self, wrapped_strategy: strategy.Strategy):
+        super().__init__()
+        self.wrapped_strategy = wrapped_strategy
+        self.environment_model = None
+
+    def take_action(self, player_deck, dealer_card) -> game_definitions.Action:
+        return self.wrapped_strategy.take_action(player_deck, dealer_card)
+
+
+class PairedComparisonResult(NamedTuple):
+    episode_count: int
+    first_win_ratio: float
+    second_win_ratio: float
+    # the first win ratio minus the second one
+    win_ratio_difference: float
+    standard_error: float
+    lower_bound: float
+    upper_bound: float
+
+
+def get_episode_card_source(random_seed: int, episode_no: int) -> card_source.CardSource:
+    return card_source.CardSource([random_seed, episode_no], block_size=episode_block_size)
+
+
+def compare_strategies(
+    first_strategy: strategy.Strategy,
+    second_strategy: strategy.Strategy,
+    episode_count: int,
+    random_seed: int,
+    confidence_z_score: float = 1.96,
+    target_half_width: Optional[float] = None,
+    check_every_n_episodes: int = 1_000
+    ) -> PairedComparisonResult:
+    """
+    Plays every episode with both strategies on identical cards, and identical random numbers for their own choices,
+    from a card source seeded with [random_seed, episode_no], so the outcomes of an episode are strongly correlated
+    and their difference varies far less than the difference of two independent simulations.
+    Stops early once the confidence interval of the win ratio difference is at most target_half_width wide on both sides.
+    Neither strategy learns from the episodes nor are explorations counted in their environment models
+    """
+    strategies = (first_strategy, second_strategy)
+    players = [player.Player(strategy=_Evaluated_strategy(strategy_instance)) for strategy_instance in strategies]
+    original_random_sources = [strategy_instance.random_source for strategy_instance in strategies]
+    win_counts = np.zeros(2, dtype=np.int64)
+    difference_sum = 0
+    difference_squared_sum = 0
+    episode_no = 0
+    try:
+        while episode_no < episode_count:
+            wins = []
+            for player_instance in players:
+                episode_card_source = get_episode_card_source(random_seed, episode_no)
+                player_instance.strategy.wrapped_strategy.random_source = episode_card_source
+                game_status, _ = game_logic.play(player_instance, episode_card_source)
+                wins.append(int(game_status == game_definitions.Status.PLAYER_WON))
+            win_counts += wins
+            difference_sum += wins[0] - wins[1]
+            difference_squared_sum += (wins[0] - wins[1]) ** 2
+            episode_no += 1
+            if target_half_width is not None and episode_no % check_every_n_episodes == 0:
+                if confidence_z_score * _get_standard_error(difference_sum, difference_squared_sum, episode_no) <= target_half_width:
+                    break
+    finally:
+        for strategy_instance, random_source in zip(strategies, original_random_sources):
+            strategy_instance.random_source = random_source
+
+    difference = difference_sum / episode_no
+    standard_error = _get_standard_error(difference_sum, difference_squared_sum, episode_no)
+    return PairedComparisonResult(
+        episode_no,
+        float(win_counts[0] / episode_no),
+        float(win_counts[1] / episode_no),
+        difference,
+        standard_error,
+        difference - confidence_z_score * standard_error,
+        difference + confidence_z_score * standard_error
+    )
+
+
+def _get_standard_error(difference_sum: float, difference_squared_sum: float, episode_count: int) -> float:
+    # the sample variance of the per-episode differences divided by the number of episodes
+    if episode_count < 2:
+        return np.inf
+    mean = difference_sum / episode_count
+    variance = (difference_squared_sum - episode_count * mean ** 2) / (episode_count - 1)
+    return float(np.sqrt(max(variance, 0.0) / episode_count))
@@ -0,0 +1,54 @@
+import environment_model
+import exact_solver
+import frozen_policy_strategy
+import paired_comparison
+import random_learning_strategy
+import numpy as np
+
+
+def get_stand_from_strategy(player_sum: int) -> frozen_policy_strategy.Frozen_policy_strategy:
+    stand_table = np.zeros(environment_model.table_shape[:3], dtype=bool)
+    stand_table[player_sum:] = True
+    return frozen_policy_strategy.Frozen_policy_strategy(stand_table)
+
+
+def test_identical_strategies_have_no_difference():
+    strategy_instance = get_stand_from_strategy(17)
+    result = paired_comparison.compare_strategies(strategy_instance, strategy_instance, 2_000, random_seed=5)
+    assert result.episode_count == 2_000
+    assert result.win_ratio_difference == 0
+    assert result.standard_error == 0
+
+
+def test_pairing_shrinks_the_standard_error():
+    optimal_strategy = frozen_policy_strategy.Frozen_policy_strategy.compile(exact_solver.solve())
+    stand_from_17_strategy = get_stand_from_strategy(17)
+    result = paired_comparison.compare_strategies(optimal_strategy, stand_from_17_strategy, 5_000, random_seed=5)
+    independent_standard_error = np.sqrt(
+        (result.first_win_ratio * (1 - result.first_win_ratio) + result.second_win_ratio * (1 - result.second_win_ratio))
+        / result.episode_count
+    )
+    assert result.standard_error < independent_standard_error / 2
+    assert result.lower_bound < result.win_ratio_difference < result.upper_bound
+
+
+def test_stops_once_the_interval_is_narrow_enough():
+    result = paired_comparison.compare_strategies(
+        get_stand_from_strategy(17),
+        get_stand_from_strategy(16),
+        100_000,
+        random_seed=5,
+        target_half_width=.02,
+        check_every_n_episodes=100
+        )
+    assert result.episode_count < 100_000
+    assert result.upper_bound - result.win_ratio_difference <= .02
+
+
+def test_comparison_leaves_the_models_untouched():
+    em = exact_solver.solve()
+    learning_strategy = random_learning_strategy.Random_learning_strategy(em, .1, .5)
+    explore_count = em.state_explore_count.copy()
+    paired_comparison.compare_strategies(learning_strategy, get_stand_from_strategy(17), 500, random_seed=5)
+    assert np.array_equal(em.state_explore_count, explore_count)
+    assert learning_strategy.random_source is None
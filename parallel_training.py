@@ -0,0 +1,209 @@
+import multiprocessing
+from collections import Counter
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+import card_source
+import environment_model
+import game_definitions
+import game_logic
+import player
+import random_learning_strategy
+
+
+def derive_worker_seed(random_seed: int, worker_index: int) -> int:
+    # the first worker keeps the original seed so that a single worker reproduces the sequential run
+    return random_seed + worker_index
+
+
+def merge_tables(
+    base_model: environment_model.EnvironmentModel,
+    worker_tables: list
+    ) -> environment_model.EnvironmentModel:
+    """
+    Merges the (values, visit counts, explore counts) tables returned by the workers
+    which all started from base_model. Every value is averaged with weights equal to the number of visits
+    the worker has made since the last merge, values nobody has visited are taken from base_model.
+    """
+    merged_model = environment_model.EnvironmentModel()
+    visit_count_increments = [visit_count - base_model.state_visit_count for _, visit_count, _ in worker_tables]
+    total_visit_count_increment = np.sum(visit_count_increments, axis=0)
+    visited = total_visit_count_increment > 0
+    merged_model.state_to_value[:] = base_model.state_to_value
+    # normalizing the weights first keeps the value of a sole visiting worker exact
+    merged_model.state_to_value[visited] = np.sum(
+        [
+            values[visited] * (increment[visited] / total_visit_count_increment[visited])
+            for (values, _, _), increment in zip(worker_tables, visit_count_increments)
+        ],
+        axis=0
+    )
+    merged_model.state_visit_count[:] = base_model.state_visit_count + total_visit_count_increment
+    merged_model.state_explore_count[:] = base_model.state_explore_count + np.sum(
+        [explore_count - base_model.state_explore_count for _, _, explore_count in worker_tables],
+        axis=0
+    )
+    return merged_model
+
+
+def _worker(
+    connection,
+    random_seed: int,
+    discount_factor: float,
+    learning_rate: float,
+    probability_of_random_choice: float,
+    default_probability_of_stand: float,
+    episodes_per_batch: int
+    ):
+    player_card_source = card_source.CardSource(random_seed)
+    player_environment_model = environment_model.EnvironmentModel()
+    player_learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=player_environment_model,
+        probability_of_random_choice=probability_of_random_choice,
+        default_probability_of_stand=default_probability_of_stand,
+        random_source=player_card_source
+        )
+    player_instance = player.Player(strategy=player_learning_strategy)
+
+    # every message is either a shard to play starting from the broadcast tables or None when training is over
+    while (message := connection.recv()) is not None:
+        (values, visit_count, explore_count), episode_count = message
+        np.copyto(player_environment_model.state_to_value, values)
+        np.copyto(player_environment_model.state_visit_count, visit_count)
+        np.copyto(player_environment_model.state_explore_count, explore_count)
+        status_counts = Counter()
+        for game_status, player_visited_bare_states in game_logic.play_episodes(player_instance, episode_count, episodes_per_batch, player_card_source):
+            player_instance.end_game(
+                game_logic.get_player_reward(game_status),
+                player_visited_bare_states,
+                discount_factor,
+                learning_rate
+                )
+            status_counts[game_status] += 1
+        connection.send((
+            (
+                player_environment_model.state_to_value,
+                player_environment_model.state_visit_count,
+                player_environment_model.state_explore_count
+            ),
+            status_counts
+        ))
+    connection.close()
+
+
+def train_in_parallel(
+    episode_count: int,
+    worker_count: int,
+    merge_every_n_episodes: int,
+    discount_factor: float,
+    learning_rate: float,
+    probability_of_random_choice: float,
+    default_probability_of_stand: float,
+    random_seed: int,
+    seed_derivation: Callable[[int, int], int] = derive_worker_seed,
+    episodes_per_batch: int = 1
+    ) -> Tuple[environment_model.EnvironmentModel, Dict[game_definitions.Status, int]]:
+    """
+    Splits episode_count episodes evenly across worker_count processes,
+    each worker plays merge_every_n_episodes of its share and sends its tables back,
+    the merged tables are then broadcast to every worker before the next round.
+    seed_derivation(random_seed, worker_index) gives the seed of every worker
+    and has to be picklable, i.e. defined at the module level.
+    """
+    worker_episode_counts = [
+        episode_count // worker_count + (1 if worker_index < episode_count % worker_count else 0)
+        for worker_index in range(worker_count)
+    ]
+    merged_model = environment_model.EnvironmentModel()
+    status_counts = Counter()
+    connections = []
+    processes = []
+    for worker_index in range(worker_count):
+        coordinator_connection, worker_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_worker,
+            args=(
+                worker_connection,
+                seed_derivation(random_seed, worker_index),
+                discount_factor,
+                learning_rate,
+                probability_of_random_choice,
+                default_probability_of_stand,
+                episodes_per_batch
+            ),
+            daemon=True
+        )
+        process.start()
+        # only the worker keeps its end open, so the coordinator notices a dead worker instead of waiting forever
+        worker_connection.close()
+        connections.append(coordinator_connection)
+        processes.append(process)
+
+    try:
+        played_episode_counts = [0] * worker_count
+        while played_episode_counts != worker_episode_counts:
+            tables = (
+                merged_model.state_to_value,
+                merged_model.state_visit_count,
+                merged_model.state_explore_count
+            )
+            shard_connections = []
+            for worker_index, connection in enumerate(connections):
+                shard_episode_count = min(
+                    merge_every_n_episodes,
+                    worker_episode_counts[worker_index] - played_episode_counts[worker_index]
+                )
+                if shard_episode_count > 0:
+                    connection.send((tables, shard_episode_count))
+                    played_episode_counts[worker_index] += shard_episode_count
+                    shard_connections.append(connection)
+            worker_tables = []
+            for connection in shard_connections:
+                tables, shard_status_counts = connection.recv()
+                worker_tables.append(tables)
+                status_counts.update(shard_status_counts)
+            merged_model = merge_tables(merged_model, worker_tables)
+    finally:
+        # a failed shutdown of one worker must neither hide the original error nor leave the other workers running
+        for connection in connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    return merged_model, dict(status_counts)
+
+
+if __name__ == "__main__":
+    episode_count = 1_000_000
+    worker_count = multiprocessing.cpu_count()
+    merge_every_n_episodes = 10_000
+    # also known as gamma
+    discount_factor = 1.0
+    learning_rate = 0.1
+    random_seed = 123
+    probability_of_random_choice = 0.1
+    default_probability_of_stand = .5
+    episodes_per_batch = 1_000
+
+    player_environment_model, status_counts = train_in_parallel(
+        episode_count=episode_count,
+        worker_count=worker_count,
+        merge_every_n_episodes=merge_every_n_episodes,
+        discount_factor=discount_factor,
+        learning_rate=learning_rate,
+        probability_of_random_choice=probability_of_random_choice,
+        default_probability_of_stand=default_probability_of_stand,
+        random_seed=random_seed,
+        episodes_per_batch=episodes_per_batch
+        )
+    for game_status, count in status_counts.items():
+        print(f"{game_status.name}: {count / episode_count: .5f}")
+    print(f"Learned state-action pairs: {np.count_nonzero(player_environment_model.state_visit_count)}")
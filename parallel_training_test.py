@@ -0,0 +1,87 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import card_source
+import environment_model
+import game_definitions
+import game_logic
+import parallel_training
+import player
+import random_learning_strategy
+
+
+def train_sequentially(episode_count, random_seed):
+    player_card_source = card_source.CardSource(random_seed)
+    em = environment_model.EnvironmentModel()
+    learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=em,
+        probability_of_random_choice=.1,
+        default_probability_of_stand=.5,
+        random_source=player_card_source
+        )
+    player_instance = player.Player(strategy=learning_strategy)
+    for game_status, player_visited_bare_states in game_logic.play_episodes(player_instance, episode_count, card_source=player_card_source):
+        player_instance.end_game(game_logic.get_player_reward(game_status), player_visited_bare_states, 1.0, .1)
+    return em
+
+
+def test_single_worker_matches_sequential_training():
+    parallel_model, status_counts = parallel_training.train_in_parallel(
+        episode_count=2_000,
+        worker_count=1,
+        merge_every_n_episodes=300,
+        discount_factor=1.0,
+        learning_rate=.1,
+        probability_of_random_choice=.1,
+        default_probability_of_stand=.5,
+        random_seed=123
+        )
+    sequential_model = train_sequentially(2_000, 123)
+    assert sum(status_counts.values()) == 2_000
+    assert np.array_equal(parallel_model.state_to_value, sequential_model.state_to_value)
+    assert np.array_equal(parallel_model.state_visit_count, sequential_model.state_visit_count)
+    assert np.array_equal(parallel_model.state_explore_count, sequential_model.state_explore_count)
+
+
+def test_merge_weights_values_by_visits_since_the_last_merge():
+    base_model = environment_model.EnvironmentModel()
+    state = (15, 10, False)
+    index = base_model.get_state_action_index(state, game_definitions.Action.HIT)
+    base_model.state_to_value[index] = 1.0
+    base_model.state_visit_count[index] = 10
+    worker_tables = []
+    for value, visit_count in ((.0, 11), (.4, 14)):
+        values = base_model.state_to_value.copy()
+        visit_counts = base_model.state_visit_count.copy()
+        values[index] = value
+        visit_counts[index] = visit_count
+        worker_tables.append((values, visit_counts, base_model.state_explore_count.copy()))
+    merged_model = parallel_training.merge_tables(base_model, worker_tables)
+    assert np.isclose(merged_model.state_to_value[index], (.0 * 1 + .4 * 4) / 5)
+    assert merged_model.state_visit_count[index] == 15
+    unvisited_index = base_model.get_state_action_index(state, game_definitions.Action.STAND)
+    assert merged_model.state_to_value[unvisited_index] == 0
+
+
+def derive_invalid_seed_for_second_worker(random_seed, worker_index):
+    # negative seeds are rejected by numpy, so the second worker dies right away
+    return -1 if worker_index == 1 else random_seed
+
+
+def test_dead_worker_surfaces_as_an_error():
+    # depending on timing the dead worker is noticed while sending it a shard or while receiving its tables
+    with pytest.raises((EOFError, ConnectionError)):
+        parallel_training.train_in_parallel(
+            episode_count=1_000,
+            worker_count=3,
+            merge_every_n_episodes=100,
+            discount_factor=1.0,
+            learning_rate=.1,
+            probability_of_random_choice=.1,
+            default_probability_of_stand=.5,
+            random_seed=1,
+            seed_derivation=derive_invalid_seed_for_second_worker
+            )
+    assert multiprocessing.active_children() == []
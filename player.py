@@ -1,6 +1,6 @@
 from game_definitions import Card, Action
-import game_logic
-from typing import List, Tuple
+import hand
+from typing import List, Tuple, Union
 import numpy as np
 import strategy
 
@@ -18,7 +18,7 @@ class Player:
 
     def get_action(
         self,
-        player_deck: List[Card],
+        player_deck: Union[hand.Hand, List[Card]],
         dealer_card: Card
     ) -> Action:
         return self.strategy.take_action(player_deck, dealer_card)
@@ -36,3 +36,18 @@ class Player:
             discount_factor,
             learning_rate
             )
+
+    def end_games(
+        self,
+        final_rewards: np.ndarray,
+        trajectories,
+        discount_factor: float,
+        learning_rate: float
+    ):
+        # the hands of a game_logic.BatchTrajectories, see end_game
+        self.strategy.game_finished_batch(
+            final_rewards,
+            trajectories,
+            discount_factor,
+            learning_rate
+            )
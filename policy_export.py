@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+
+import environment_model
+
+
+class ReadOnlyEnvironmentModel(environment_model.EnvironmentModel):
+    """
+    An environment model whose value table is a read-only memory map of an exported table,
+    every process loading the same file shares one page-cached copy of it.
+    The visit and explore counters stay private to the process so the model can still be played with.
+    """
+
+    def __init__(self, state_to_value: np.ndarray):
+        super().__init__()
+        self.state_to_value = state_to_value
+
+    def set_state_action_value(self, state, action, new_value):
+        raise Exception("The value table of a read-only environment model cannot be modified.")
+
+    def update_state_action_value(self, state, action, target, learning_rate):
+        raise Exception("The value table of a read-only environment model cannot be modified.")
+
+    def update_episodes(self, flat_index_rows, final_rewards, discount_factor, learning_rate):
+        raise Exception("The value table of a read-only environment model cannot be modified.")
+
+    def set_values_at(self, indices, new_values):
+        raise Exception("The value table of a read-only environment model cannot be modified.")
+
+
+def export_value_table(envmodel: environment_model.EnvironmentModel, path: str):
+    # a plain .npy file can be memory-mapped directly, the rename keeps readers from ever seeing a partial file
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as table_file:
+        np.save(table_file, np.ascontiguousarray(envmodel.state_to_value, dtype=np.float64))
+    os.replace(temporary_path, path)
+
+
+def load_read_only_model(path: str) -> ReadOnlyEnvironmentModel:
+    state_to_value = np.load(path, mmap_mode="r")
+    if state_to_value.shape != environment_model.table_shape:
+        raise Exception(f"Unexpected value table shape {state_to_value.shape}, expected {environment_model.table_shape}")
+    return ReadOnlyEnvironmentModel(state_to_value)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import exact_solver
+import game_definitions
+import policy_export
+import random_fixed_strategy
+
+
+def test_exported_table_loads_as_read_only_model(tmp_path):
+    exact_model = exact_solver.solve()
+    path = str(tmp_path / "policy.npy")
+    policy_export.export_value_table(exact_model, path)
+    read_only_model = policy_export.load_read_only_model(path)
+    assert np.array_equal(read_only_model.state_to_value, exact_model.state_to_value)
+    state = (20, 10, False)
+    assert read_only_model.get_state_action_value(state, game_definitions.Action.STAND) == \
+        exact_model.get_state_action_value(state, game_definitions.Action.STAND)
+    with pytest.raises(Exception):
+        read_only_model.set_state_action_value(state, game_definitions.Action.STAND, 0)
+    with pytest.raises(ValueError):
+        read_only_model.state_to_value[state[0], state[1], 0, 0] = 0
+    # the counters are private to the process
+    read_only_model.increment_state_action_explore_counter(state, game_definitions.Action.STAND)
+
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(
+        environment_model=read_only_model,
+        default_probability_of_stand=.5
+        )
+    player_deck = [game_definitions.Card.KING, game_definitions.Card.QUEEN]
+    assert fixed_strategy.take_action(player_deck, game_definitions.Card.TEN) == game_definitions.Action.STAND
+    player_deck = [game_definitions.Card.KING, game_definitions.Card.SIX]
+    assert fixed_strategy.take_action(player_deck, game_definitions.Card.TEN) == game_definitions.Action.HIT
@@ -0,0 +1,133 @@
+import contextlib
+import json
+import time
+from typing import Dict, Iterable, List
+
+# the histograms have one bucket per power of two nanoseconds
+histogram_bucket_count = 64
+
+
+class PhaseStatistics:
+    __slots__ = ("call_count", "total_nanoseconds", "histogram")
+
+    def __init__(self):
+        self.call_count = 0
+        self.total_nanoseconds = 0
+        self.histogram = [0] * histogram_bucket_count
+
+    def record(self, elapsed_nanoseconds: int):
+        self.call_count += 1
+        self.total_nanoseconds += elapsed_nanoseconds
+        self.histogram[min(elapsed_nanoseconds.bit_length(), histogram_bucket_count - 1)] += 1
+
+    def get_quantile_nanoseconds(self, quantile: float) -> int:
+        # the upper bound of the bucket holding the quantile
+        threshold = quantile * self.call_count
+        cumulative_count = 0
+        for bucket, count in enumerate(self.histogram):
+            cumulative_count += count
+            if cumulative_count >= threshold and count > 0:
+                return 2 ** bucket
+        return 0
+
+
+class _PhaseTimer:
+    __slots__ = ("statistics", "start")
+
+    def __init__(self, statistics: PhaseStatistics):
+        self.statistics = statistics
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exception_info):
+        self.statistics.record(time.perf_counter_ns() - self.start)
+
+
+class PhaseProfiler:
+    """
+    Opt-in wall time histograms and call counts per named phase.
+    A disabled profiler hands out one shared null context and leaves wrapped objects untouched,
+    so leaving the instrumentation in place costs next to nothing.
+    Phases may be nested, e.g. the decisions of the player are part of playing an episode.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.phases: Dict[str, PhaseStatistics] = {}
+        self._timers: Dict[str, _PhaseTimer] = {}
+        self._null_context = contextlib.nullcontext()
+
+    def _get_statistics(self, name: str) -> PhaseStatistics:
+        if name not in self.phases:
+            self.phases[name] = PhaseStatistics()
+            self._timers[name] = _PhaseTimer(self.phases[name])
+        return self.phases[name]
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return self._null_context
+        self._get_statistics(name)
+        return self._timers[name]
+
+    def time_iterator(self, name: str, iterable: Iterable) -> Iterable:
+        # times producing every element, e.g. playing an episode of game_logic.play_episodes
+        if not self.enabled:
+            return iterable
+        return self._timed_iterator(self._get_statistics(name), iter(iterable))
+
+    @staticmethod
+    def _timed_iterator(statistics: PhaseStatistics, iterator):
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                element = next(iterator)
+            except StopIteration:
+                return
+            statistics.record(time.perf_counter_ns() - start)
+            yield element
+
+    def instrument(self, instance, method_name: str, name: str):
+        # replaces the method of this very instance by a timed one
+        if not self.enabled:
+            return
+        method = getattr(instance, method_name)
+        statistics = self._get_statistics(name)
+
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                statistics.record(time.perf_counter_ns() - start)
+        setattr(instance, method_name, timed_method)
+
+    def format_report(self) -> List[str]:
+        lines = []
+        for name, statistics in sorted(self.phases.items(), key=lambda item: -item[1].total_nanoseconds):
+            if statistics.call_count == 0:
+                continue
+            lines.append(
+                f"{name}: {statistics.call_count} calls, {statistics.total_nanoseconds / 1e9: .3f} s total, "
+                f"{statistics.total_nanoseconds / statistics.call_count / 1e3: .2f} us mean, "
+                f"p50 < {statistics.get_quantile_nanoseconds(.5) / 1e3: .2f} us, "
+                f"p99 < {statistics.get_quantile_nanoseconds(.99) / 1e3: .2f} us"
+            )
+        return lines
+
+    def dump_json(self, path: str):
+        with open(path, "w") as report_file:
+            json.dump(
+                {
+                    name: {
+                        "call_count": statistics.call_count,
+                        "total_nanoseconds": statistics.total_nanoseconds,
+                        # histogram[i] counts the calls that took less than 2 ** i nanoseconds but not less than 2 ** (i - 1)
+                        "histogram": statistics.histogram
+                    }
+                    for name, statistics in self.phases.items()
+                },
+                report_file,
+                indent=2
+            )
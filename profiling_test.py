@@ -0,0 +1,48 @@
+import json
+
+import profiling
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def increment(self):
+        self.value += 1
+        return self.value
+
+
+def test_disabled_profiler_leaves_everything_untouched():
+    profiler = profiling.PhaseProfiler(enabled=False)
+    counter = Counter()
+    profiler.instrument(counter, "increment", "increment")
+    assert "increment" not in vars(counter)
+    numbers = [1, 2, 3]
+    assert profiler.time_iterator("numbers", numbers) is numbers
+    assert profiler.phase("a") is profiler.phase("b")
+    with profiler.phase("a"):
+        pass
+    assert profiler.phases == {}
+    assert profiler.format_report() == []
+
+
+def test_enabled_profiler_counts_calls_per_phase(tmp_path):
+    profiler = profiling.PhaseProfiler(enabled=True)
+    counter = Counter()
+    profiler.instrument(counter, "increment", "increment")
+    assert [counter.increment() for _ in range(5)] == [1, 2, 3, 4, 5]
+    assert list(profiler.time_iterator("numbers", range(3))) == [0, 1, 2]
+    for _ in range(4):
+        with profiler.phase("block"):
+            pass
+    assert profiler.phases["increment"].call_count == 5
+    assert profiler.phases["numbers"].call_count == 3
+    assert profiler.phases["block"].call_count == 4
+    assert sum(profiler.phases["block"].histogram) == 4
+    assert len(profiler.format_report()) == 3
+
+    report_path = str(tmp_path / "profile.json")
+    profiler.dump_json(report_path)
+    with open(report_path) as report_file:
+        report = json.load(report_file)
+    assert report["increment"]["call_count"] == 5
@@ -1,9 +1,10 @@
 import numpy as np
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
 import strategy
-import game_logic
+import card_source
+import hand
 import game_definitions
 import environment_model
 
@@ -12,11 +13,13 @@ class Random_fixed_strategy(strategy.Strategy):
     def __init__(
             self,
             environment_model: environment_model.EnvironmentModel,
-            default_probability_of_stand: float
+            default_probability_of_stand: float,
+            random_source: Optional[card_source.CardSource] = None
             ):
         super().__init__()
         self.environment_model = environment_model
         self.default_probability_of_stand = default_probability_of_stand
+        self.random_source = random_source
 
     @property
     def environment_model(self):
@@ -28,23 +31,19 @@ class Random_fixed_strategy(strategy.Strategy):
 
     def take_action(
         self,
-        player_deck: List[game_definitions.Card],
+        player_deck: Union[hand.Hand, List[game_definitions.Card]],
         dealer_card: game_definitions.Card
         ) -> game_definitions.Action:
 
-        maximal_nonbusting_player_deck_value = max(
-            game_logic.evaluate_nonbusting_deck_values(player_deck)
-        )
+        state = self.environment_model.convert_to_state(player_deck, dealer_card)
 
-        if maximal_nonbusting_player_deck_value <= 11:
+        if state[0] <= 11:
             # it is always disadvantageous for the player to stand when their deck score does not exceed 11
             return game_definitions.Action.HIT
         else:
             # the sum of 1/k increases without bound yet the sum 1/k^2 is finite
             # which ensures convergence
 
-            state = environment_model.EnvironmentModel.convert_to_state(player_deck, dealer_card)
-
             hit_value = self.environment_model.get_state_action_value(
                 state, game_definitions.Action.HIT)
             stand_value = self.environment_model.get_state_action_value(
@@ -55,13 +54,49 @@ class Random_fixed_strategy(strategy.Strategy):
                 return game_definitions.Action.STAND
             elif stand_value == hit_value:
                 # break ties
-                if np.random.random() <= self.default_probability_of_stand:
+                if self.draw_random() <= self.default_probability_of_stand:
                     return game_definitions.Action.STAND
             return game_definitions.Action.HIT
 
         # avoiding bust strategy
         # return game_definitions.Action.STAND if maximal_nonbusting_player_deck_value >= 12 else game_definitions.Action.HIT
 
+    def take_actions(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray
+        ) -> np.ndarray:
+        hit_values = self.environment_model.get_state_action_values(
+            player_sums, dealer_values, usable_aces, game_definitions.Action.HIT)
+        stand_values = self.environment_model.get_state_action_values(
+            player_sums, dealer_values, usable_aces, game_definitions.Action.STAND)
+
+        # act greedily and break ties randomly
+        default_stand = self.draw_randoms(len(player_sums)) <= self.default_probability_of_stand
+        stand = (stand_values > hit_values) | ((stand_values == hit_values) & default_stand)
+        # it is always disadvantageous for the player to stand when their deck score does not exceed 11
+        stand &= player_sums > 11
+        return np.where(stand, game_definitions.Action.STAND.value, game_definitions.Action.HIT.value)
+
+    def stand_probabilities(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray
+        ) -> np.ndarray:
+        hit_values = self.environment_model.get_state_action_values(
+            player_sums, dealer_values, usable_aces, game_definitions.Action.HIT)
+        stand_values = self.environment_model.get_state_action_values(
+            player_sums, dealer_values, usable_aces, game_definitions.Action.STAND)
+
+        stand_probabilities = np.where(
+            stand_values == hit_values,
+            self.default_probability_of_stand,
+            (stand_values > hit_values).astype(np.float64)
+        )
+        return np.where(np.asarray(player_sums) > 11, stand_probabilities, 0.0)
+
     def game_finished(
         self,
         final_reward: float,
@@ -72,12 +107,23 @@ class Random_fixed_strategy(strategy.Strategy):
         # assuming discount factor belongs to the terminal state which is not included in player's environment_model
         discounted_reward = final_reward
         for state, action in reversed(player_visited_bare_states):
-
-            state_value = self.environment_model.get_state_action_value(state, action)
-            visit_count = 1 + self.environment_model.get_state_action_visit_count(state, action)
-            new_state_value = (1 - learning_rate) * state_value + learning_rate * (discounted_reward - state_value)
-            self.environment_model.set_state_action_value(state, action, new_state_value)
-            self.environment_model.increment_state_action_visit_counter(state, action)
+            new_state_value = self.environment_model.update_state_action_value(
+                state, action, discounted_reward, learning_rate)
             # there are no intermediate rewards, so the discounting process is simplified
             # unsure whether this is the right formula, need to verify
-            discounted_reward = new_state_value * discount_factor
\ No newline at end of file
+            discounted_reward = new_state_value * discount_factor
+
+    def game_finished_batch(
+        self,
+        final_rewards: np.ndarray,
+        trajectories,
+        discount_factor: float,
+        learning_rate: float
+        ):
+        # game_finished for every hand of a game_logic.BatchTrajectories without building the visited state lists
+        self.environment_model.update_episodes(
+            trajectories.get_flat_index_rows(self.environment_model),
+            final_rewards.tolist(),
+            discount_factor,
+            learning_rate
+        )
\ No newline at end of file
@@ -0,0 +1,193 @@
+from enum import Enum, auto
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import card_source
+import environment_model
+import game_definitions
+import game_logic
+
+# the tables are addressed through flat state indices over every axis but the action one
+state_shape = environment_model.table_shape[:-1]
+action_count = environment_model.table_shape[-1]
+
+
+class SamplingMethod(Enum):
+    # consumes the oldest transitions, each of them is learned from exactly once
+    FIFO = auto()
+    # draws stored transitions uniformly with replacement
+    UNIFORM = auto()
+    # draws stored transitions with probability proportional to 1/(1 + visit count) of their state-action pair
+    PRIORITIZED = auto()
+
+
+class ReplayBuffer:
+    """
+    A fixed-capacity ring buffer of transitions stored as parallel arrays of flat state indices, action indices and returns,
+    once it is full the newest transitions overwrite the oldest ones
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.state_indices = np.zeros(capacity, dtype=np.int64)
+        self.action_indices = np.zeros(capacity, dtype=np.int8)
+        self.returns = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self._next_position = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def oldest_position(self) -> int:
+        return (self._next_position - self.size) % self.capacity
+
+    def add(self, state_indices: np.ndarray, action_indices: np.ndarray, returns: np.ndarray):
+        # only the newest capacity transitions of an oversized addition survive anyway
+        state_indices = state_indices[-self.capacity:]
+        action_indices = action_indices[-self.capacity:]
+        returns = returns[-self.capacity:]
+        positions = (self._next_position + np.arange(len(returns))) % self.capacity
+        self.state_indices[positions] = state_indices
+        self.action_indices[positions] = action_indices
+        self.returns[positions] = returns
+        self._next_position = (self._next_position + len(returns)) % self.capacity
+        self.size = min(self.capacity, self.size + len(returns))
+
+    def add_episode(
+        self,
+        final_reward: float,
+        player_visited_bare_states: List[Tuple[Tuple[int, int, bool], game_definitions.Action]],
+        discount_factor: float
+        ):
+        # there are no intermediate rewards, so the return of a step is the discounted final reward
+        player_sums, dealer_values, usable_aces, actions = zip(*(
+            state + (action.value,) for state, action in player_visited_bare_states
+        ))
+        steps_to_end = np.arange(len(player_visited_bare_states))[::-1]
+        self._add_states(
+            environment_model.EnvironmentModel.get_state_action_indices(
+                np.array(player_sums), np.array(dealer_values), np.array(usable_aces), np.array(actions)
+            ),
+            final_reward * discount_factor ** steps_to_end
+        )
+
+    def add_batch(self, final_rewards: np.ndarray, trajectories: game_logic.BatchTrajectories, discount_factor: float):
+        """ Stores every step of a batch returned by game_logic.play_batch without building the per-episode lists """
+        step_numbers = np.arange(trajectories.actions.shape[1])
+        played = step_numbers < trajectories.lengths[:, None]
+        steps_to_end = (trajectories.lengths[:, None] - 1 - step_numbers)[played]
+        final_rewards = np.broadcast_to(np.asarray(final_rewards)[:, None], played.shape)[played]
+        dealer_values = np.broadcast_to(trajectories.dealer_values[:, None], played.shape)[played]
+        self._add_states(
+            environment_model.EnvironmentModel.get_state_action_indices(
+                trajectories.player_sums[played],
+                dealer_values,
+                trajectories.usable_aces[played],
+                trajectories.actions[played]
+            ),
+            final_rewards * discount_factor ** steps_to_end
+        )
+
+    def _add_states(self, indices: environment_model.StateActionIndices, returns: np.ndarray):
+        player_sums, dealer_values, usable_aces, action_indices = indices
+        self.add(np.ravel_multi_index((player_sums, dealer_values, usable_aces), state_shape), action_indices, returns)
+
+    def take_oldest(self, count: int) -> np.ndarray:
+        """ Removes at most count oldest transitions and returns their positions, which stay valid until the next addition """
+        count = min(count, self.size)
+        positions = (self.oldest_position + np.arange(count)) % self.capacity
+        self.size -= count
+        return positions
+
+    def get_state_action_indices(self, positions: np.ndarray) -> np.ndarray:
+        # flat indices into the tables of environment_model.EnvironmentModel
+        return self.state_indices[positions] * action_count + self.action_indices[positions]
+
+    def get_state(self) -> dict:
+        # the stored transitions are unrolled so that the oldest one comes first
+        positions = (self.oldest_position + np.arange(self.size)) % self.capacity
+        return {
+            "capacity": self.capacity,
+            "state_indices": self.state_indices[positions],
+            "action_indices": self.action_indices[positions],
+            "returns": self.returns[positions]
+        }
+
+    def set_state(self, state: dict):
+        self.__init__(state["capacity"])
+        self.add(
+            np.asarray(state["state_indices"], dtype=np.int64),
+            np.asarray(state["action_indices"], dtype=np.int8),
+            np.asarray(state["returns"], dtype=np.float64)
+        )
+
+
+class ReplayLearner:
+    """
+    Learns from the transitions of a ReplayBuffer in minibatches instead of after every episode,
+    every minibatch is applied to the table with a few vectorized scatter-adds
+    """
+
+    def __init__(
+        self,
+        environment_model: environment_model.EnvironmentModel,
+        buffer: ReplayBuffer,
+        learning_rate: float,
+        minibatch_size: int,
+        sampling_method: SamplingMethod = SamplingMethod.FIFO,
+        random_source: Optional[card_source.CardSource] = None
+        ):
+        self.environment_model = environment_model
+        self.buffer = buffer
+        self.learning_rate = learning_rate
+        self.minibatch_size = minibatch_size
+        self.sampling_method = sampling_method
+        self.random_source = random_source
+
+    def draw_randoms(self, count: int) -> np.ndarray:
+        return np.random.random(count) if self.random_source is None else self.random_source.random_array(count)
+
+    def sample_positions(self) -> np.ndarray:
+        if self.sampling_method == SamplingMethod.FIFO:
+            return self.buffer.take_oldest(self.minibatch_size)
+        if self.buffer.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        stored_positions = (self.buffer.oldest_position + np.arange(self.buffer.size)) % self.buffer.capacity
+        random_numbers = self.draw_randoms(self.minibatch_size)
+        if self.sampling_method == SamplingMethod.UNIFORM:
+            return stored_positions[(random_numbers * self.buffer.size).astype(np.int64)]
+        visit_counts = self.environment_model.state_visit_count.reshape(-1)[
+            self.buffer.get_state_action_indices(stored_positions)
+        ]
+        cumulative_priorities = np.cumsum(1 / (1 + visit_counts))
+        chosen = np.searchsorted(cumulative_priorities, random_numbers * cumulative_priorities[-1], side="right")
+        return stored_positions[np.minimum(chosen, self.buffer.size - 1)]
+
+    def learn(self, minibatch_count: int = 1) -> int:
+        """ Applies minibatch_count minibatches and returns the number of transitions learned from """
+        learned_count = 0
+        for _ in range(minibatch_count):
+            positions = self.sample_positions()
+            if positions.size == 0:
+                break
+            self.apply_updates(self.buffer.get_state_action_indices(positions), self.buffer.returns[positions])
+            learned_count += positions.size
+        return learned_count
+
+    def apply_updates(self, flat_indices: np.ndarray, returns: np.ndarray):
+        """
+        Applies v <- v + learning_rate * (G - v) for every transition, the k updates of one state-action pair
+        within a minibatch are merged into v <- (1 - learning_rate)^k v + (1 - (1 - learning_rate)^k) mean(G),
+        which is exact when they share a return and otherwise does not depend on their order
+        """
+        table_size = self.environment_model.state_to_value.size
+        counts = np.bincount(flat_indices, minlength=table_size)
+        return_sums = np.bincount(flat_indices, weights=returns, minlength=table_size)
+        updated = np.flatnonzero(counts)
+        decay = (1 - self.learning_rate) ** counts[updated]
+        # the tables are contiguous, so reshape gives views that write through
+        values = self.environment_model.state_to_value.reshape(-1)
+        values[updated] = decay * values[updated] + (1 - decay) * return_sums[updated] / counts[updated]
+        self.environment_model.state_visit_count.reshape(-1)[updated] += counts[updated]
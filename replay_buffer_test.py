@@ -0,0 +1,74 @@
+from game_definitions import Action
+import environment_model
+import game_logic
+import random_fixed_strategy
+import random_learning_strategy
+import replay_buffer
+import numpy as np
+
+
+def test_ring_buffer_keeps_the_newest_transitions():
+    buffer = replay_buffer.ReplayBuffer(capacity=4)
+    buffer.add(np.arange(3), np.zeros(3, dtype=np.int8), np.arange(3, dtype=np.float64))
+    buffer.add(np.arange(3, 6), np.zeros(3, dtype=np.int8), np.arange(3, 6, dtype=np.float64))
+    assert len(buffer) == 4
+    assert list(buffer.returns[buffer.take_oldest(10)]) == [2, 3, 4, 5]
+    assert len(buffer) == 0
+
+
+def test_fifo_learning_matches_incremental_updates():
+    visited_bare_states = [((12, 10, False), Action.HIT), ((19, 10, False), Action.STAND)]
+    learning_rate = .1
+    sequential_model = environment_model.EnvironmentModel()
+    learning_strategy = random_learning_strategy.Random_learning_strategy(sequential_model, .1, .5)
+    replay_model = environment_model.EnvironmentModel()
+    buffer = replay_buffer.ReplayBuffer(capacity=100)
+    learner = replay_buffer.ReplayLearner(replay_model, buffer, learning_rate, minibatch_size=100)
+    for final_reward in (1.0, 1.0, 1.0):
+        learning_strategy.game_finished(final_reward, visited_bare_states, 1.0, learning_rate)
+        buffer.add_episode(final_reward, visited_bare_states, 1.0)
+    assert learner.learn(5) == 6
+    # the buffer stores Monte Carlo returns, while game_finished bootstraps the earlier steps from the updated values
+    stand_index = environment_model.EnvironmentModel.get_state_action_index(*visited_bare_states[-1])
+    assert np.isclose(replay_model.state_to_value[stand_index], sequential_model.state_to_value[stand_index])
+    hit_index = environment_model.EnvironmentModel.get_state_action_index(*visited_bare_states[0])
+    assert np.isclose(replay_model.state_to_value[hit_index], 1 - (1 - learning_rate) ** 3)
+    assert np.array_equal(replay_model.state_visit_count, sequential_model.state_visit_count)
+
+
+def test_add_batch_matches_add_episode():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    fixed_strategy = random_fixed_strategy.Random_fixed_strategy(environment_model=em, default_probability_of_stand=.5)
+    statuses, trajectories = game_logic.play_batch(fixed_strategy, 200)
+    batch_buffer = replay_buffer.ReplayBuffer(capacity=10_000)
+    batch_buffer.add_batch(game_logic.status_value_to_reward[statuses], trajectories, .9)
+    episode_buffer = replay_buffer.ReplayBuffer(capacity=10_000)
+    for hand_index, status in enumerate(statuses):
+        episode_buffer.add_episode(
+            game_logic.get_player_reward(game_logic.game_definitions.Status(int(status))),
+            trajectories.get_visited_bare_states(hand_index),
+            .9
+        )
+    assert len(batch_buffer) == len(episode_buffer) == trajectories.lengths.sum()
+    positions = np.arange(len(batch_buffer))
+    assert np.array_equal(
+        batch_buffer.get_state_action_indices(positions),
+        episode_buffer.get_state_action_indices(positions)
+    )
+    assert np.allclose(batch_buffer.returns[positions], episode_buffer.returns[positions])
+
+
+def test_prioritized_sampling_prefers_rarely_visited_pairs():
+    np.random.seed(123)
+    em = environment_model.EnvironmentModel()
+    buffer = replay_buffer.ReplayBuffer(capacity=10)
+    buffer.add(np.array([0, 1]), np.array([0, 0], dtype=np.int8), np.zeros(2))
+    em.state_visit_count.reshape(-1)[0] = 99
+    learner = replay_buffer.ReplayLearner(
+        em, buffer, .1, minibatch_size=10_000, sampling_method=replay_buffer.SamplingMethod.PRIORITIZED
+        )
+    sampled_state_indices = buffer.state_indices[learner.sample_positions()]
+    # the weights are 1/100 and 1/1
+    assert abs(np.mean(sampled_state_indices == 0) - 1 / 101) < .005
+    assert len(buffer) == 2
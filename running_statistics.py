@@ -0,0 +1,137 @@
+import numpy as np
+
+import game_definitions
+
+
+class RunningStatistics:
+    """
+    Win statistics updated in O(1) per episode, both for all games played so far (Welford's algorithm)
+    and for the latest window_size games (a ring buffer with running sums).
+    Draws count as games the player has not won and are tracked separately as well.
+    """
+
+    def __init__(self, window_size: int):
+        self.window_size = window_size
+        self.episode_count = 0
+        self.status_counts = {status: 0 for status in game_definitions.Status}
+        self.win_ratio = 0.0
+        self._win_squared_deviation_sum = 0.0
+        # the latest outcomes, 1 for a player win, 2 for a draw and 0 otherwise
+        self._window = np.zeros(window_size, dtype=np.int8)
+        self._window_position = 0
+        self._window_fill = 0
+        self._window_win_count = 0
+        self._window_draw_count = 0
+
+    def update(self, status: game_definitions.Status):
+        if status == game_definitions.Status.PLAYER_WON:
+            outcome = 1
+        elif status == game_definitions.Status.DRAW:
+            outcome = 2
+        elif status == game_definitions.Status.DEALER_WON:
+            outcome = 0
+        else:
+            raise Exception(f"Unexpected game state: {status}")
+        self.status_counts[status] += 1
+
+        # Welford's update of the mean and the sum of squared deviations of the win indicator
+        self.episode_count += 1
+        win = float(outcome == 1)
+        delta = win - self.win_ratio
+        self.win_ratio += delta / self.episode_count
+        self._win_squared_deviation_sum += delta * (win - self.win_ratio)
+
+        if self._window_fill == self.window_size:
+            dropped_outcome = self._window[self._window_position]
+            self._window_win_count -= dropped_outcome == 1
+            self._window_draw_count -= dropped_outcome == 2
+        else:
+            self._window_fill += 1
+        self._window[self._window_position] = outcome
+        self._window_win_count += outcome == 1
+        self._window_draw_count += outcome == 2
+        self._window_position = (self._window_position + 1) % self.window_size
+
+    def update_batch(self, statuses: np.ndarray):
+        """ update() for a whole batch of the values of game_definitions.Status, e.g. as returned by game_logic.play_batch """
+        statuses = np.asarray(statuses)
+        if len(statuses) == 0:
+            return
+        outcomes = np.zeros(len(statuses), dtype=np.int8)
+        outcomes[statuses == game_definitions.Status.PLAYER_WON.value] = 1
+        outcomes[statuses == game_definitions.Status.DRAW.value] = 2
+        unexpected = (outcomes == 0) & (statuses != game_definitions.Status.DEALER_WON.value)
+        if unexpected.any():
+            raise Exception(f"Unexpected game state: {game_definitions.Status(int(statuses[unexpected][0]))}")
+        for status in game_definitions.Status:
+            self.status_counts[status] += int(np.count_nonzero(statuses == status.value))
+
+        # Chan's merge of the mean and the sum of squared deviations, a batch of win indicators has M2 = n p (1 - p)
+        batch_count = len(outcomes)
+        batch_win_ratio = np.count_nonzero(outcomes == 1) / batch_count
+        total_count = self.episode_count + batch_count
+        delta = batch_win_ratio - self.win_ratio
+        self._win_squared_deviation_sum += batch_count * batch_win_ratio * (1 - batch_win_ratio) \
+            + delta ** 2 * self.episode_count * batch_count / total_count
+        self.win_ratio += delta * batch_count / total_count
+        self.episode_count = total_count
+
+        # only the latest window_size outcomes of the batch can stay in the window
+        outcomes = outcomes[-self.window_size:]
+        positions = (self._window_position + np.arange(len(outcomes))) % self.window_size
+        # the first window_size - fill positions are still empty
+        overwritten = self._window[positions[max(0, self.window_size - self._window_fill):]]
+        self._window_win_count -= int(np.count_nonzero(overwritten == 1))
+        self._window_draw_count -= int(np.count_nonzero(overwritten == 2))
+        self._window[positions] = outcomes
+        self._window_win_count += int(np.count_nonzero(outcomes == 1))
+        self._window_draw_count += int(np.count_nonzero(outcomes == 2))
+        self._window_fill = min(self.window_size, self._window_fill + len(outcomes))
+        self._window_position = (self._window_position + len(outcomes)) % self.window_size
+
+    def get_state(self) -> dict:
+        return {
+            "window_size": self.window_size,
+            "episode_count": self.episode_count,
+            "status_counts": {status.name: count for status, count in self.status_counts.items()},
+            "win_ratio": self.win_ratio,
+            "win_squared_deviation_sum": self._win_squared_deviation_sum,
+            # the window is unrolled so that the oldest outcome comes first
+            "window": np.roll(self._window, -self._window_position)[self.window_size - self._window_fill:]
+        }
+
+    def set_state(self, state: dict):
+        self.__init__(state["window_size"])
+        self.episode_count = state["episode_count"]
+        self.status_counts = {game_definitions.Status[name]: count for name, count in state["status_counts"].items()}
+        self.win_ratio = state["win_ratio"]
+        self._win_squared_deviation_sum = state["win_squared_deviation_sum"]
+        window = np.asarray(state["window"], dtype=np.int8)
+        self._window[:len(window)] = window
+        self._window_fill = len(window)
+        self._window_position = len(window) % self.window_size
+        self._window_win_count = int(np.count_nonzero(window == 1))
+        self._window_draw_count = int(np.count_nonzero(window == 2))
+
+    @property
+    def win_ratio_std(self) -> float:
+        # population standard deviation, just as np.std computes it
+        return np.sqrt(self._win_squared_deviation_sum / self.episode_count) if self.episode_count > 0 else 0.0
+
+    @property
+    def draw_ratio(self) -> float:
+        return self.status_counts[game_definitions.Status.DRAW] / self.episode_count if self.episode_count > 0 else 0.0
+
+    @property
+    def latest_win_ratio(self) -> float:
+        return self._window_win_count / self._window_fill if self._window_fill > 0 else 0.0
+
+    @property
+    def latest_win_ratio_std(self) -> float:
+        # the win indicator only takes values 0 and 1 so its variance is p(1 - p)
+        latest_win_ratio = self.latest_win_ratio
+        return np.sqrt(latest_win_ratio * (1 - latest_win_ratio))
+
+    @property
+    def latest_draw_ratio(self) -> float:
+        return self._window_draw_count / self._window_fill if self._window_fill > 0 else 0.0
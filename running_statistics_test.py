@@ -0,0 +1,53 @@
+import numpy as np
+
+import game_definitions
+import running_statistics
+
+
+def test_running_statistics_match_full_history_statistics():
+    np.random.seed(123)
+    statuses = [
+        game_definitions.Status.PLAYER_WON,
+        game_definitions.Status.DEALER_WON,
+        game_definitions.Status.DRAW
+    ]
+    history = [statuses[i] for i in np.random.choice(3, size=1000, p=[.4, .5, .1])]
+    window_size = 64
+    player_statistics = running_statistics.RunningStatistics(window_size)
+    for episode_no, status in enumerate(history):
+        player_statistics.update(status)
+        wins = np.array([s == game_definitions.Status.PLAYER_WON for s in history[:episode_no + 1]])
+        draws = np.array([s == game_definitions.Status.DRAW for s in history[:episode_no + 1]])
+        assert np.isclose(player_statistics.win_ratio, np.average(wins))
+        assert np.isclose(player_statistics.win_ratio_std, np.std(wins))
+        assert np.isclose(player_statistics.draw_ratio, np.average(draws))
+        assert np.isclose(player_statistics.latest_win_ratio, np.average(wins[-window_size:]))
+        assert np.isclose(player_statistics.latest_win_ratio_std, np.std(wins[-window_size:]))
+        assert np.isclose(player_statistics.latest_draw_ratio, np.average(draws[-window_size:]))
+    assert player_statistics.status_counts[game_definitions.Status.DRAW] == sum(draws)
+
+
+def test_batch_updates_match_single_updates():
+    np.random.seed(123)
+    statuses = [
+        game_definitions.Status.PLAYER_WON,
+        game_definitions.Status.DEALER_WON,
+        game_definitions.Status.DRAW
+    ]
+    history = [statuses[i] for i in np.random.choice(3, size=1000, p=[.4, .5, .1])]
+    single_statistics = running_statistics.RunningStatistics(64)
+    batch_statistics = running_statistics.RunningStatistics(64)
+    batch_start = 0
+    for batch_size in [10, 50, 3, 100, 1, 200, 636]:
+        batch = history[batch_start:batch_start + batch_size]
+        batch_start += batch_size
+        for status in batch:
+            single_statistics.update(status)
+        batch_statistics.update_batch(np.array([status.value for status in batch]))
+        assert batch_statistics.episode_count == single_statistics.episode_count
+        assert batch_statistics.status_counts == single_statistics.status_counts
+        assert np.isclose(batch_statistics.win_ratio, single_statistics.win_ratio)
+        assert np.isclose(batch_statistics.win_ratio_std, single_statistics.win_ratio_std)
+        assert batch_statistics.latest_win_ratio == single_statistics.latest_win_ratio
+        assert batch_statistics.latest_draw_ratio == single_statistics.latest_draw_ratio
+    assert np.array_equal(batch_statistics.get_state()["window"], single_statistics.get_state()["window"])
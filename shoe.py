@@ -0,0 +1,144 @@
+import bisect
+from typing import List, Tuple, Union
+
+import numpy as np
+
+import card_source
+import environment_model
+import game_definitions
+import hand
+
+cards_per_rank_in_deck = 4
+cards_per_deck = cards_per_rank_in_deck * len(game_definitions.Card)
+# Hi-Lo tags, low cards leaving the shoe favour the player
+hi_lo_tags = {
+    card: 1 if max(values) <= 6 else (-1 if max(values) >= 10 else 0)
+    for card, values in game_definitions.card_values.items()
+}
+card_index_hi_lo_tags = np.array([hi_lo_tags[card] for card in card_source.cards])
+_hi_lo_tag_list = card_index_hi_lo_tags.tolist()
+
+
+class Shoe:
+    """
+    A finite shoe of deck_count decks dealt in O(1) per card from a pre-shuffled array of card indices,
+    it is reshuffled at the beginning of the first round after the penetration fraction of it has been dealt.
+    It can be used wherever a card_source.CardSource deals cards.
+    """
+
+    is_infinite = False
+
+    def __init__(self, deck_count: int = 6, penetration: float = .75, seed=None):
+        self.deck_count = deck_count
+        self.penetration = penetration
+        self.generator = np.random.default_rng(seed)
+        self._shoe = np.repeat(np.arange(len(card_source.cards)), cards_per_rank_in_deck * deck_count)
+        self.shuffle_count = 0
+        self.shuffle()
+
+    def shuffle(self):
+        self.generator.shuffle(self._shoe)
+        # python lists make dealing a single card cheaper than indexing numpy arrays
+        self._shoe_order = self._shoe.tolist()
+        self._position = 0
+        self.remaining_counts = np.full(len(card_source.cards), cards_per_rank_in_deck * self.deck_count)
+        self.running_count = 0
+        self.shuffle_count += 1
+
+    def begin_round(self):
+        if self._position >= self.penetration * len(self._shoe_order):
+            self.shuffle()
+
+    @property
+    def remaining_card_count(self) -> int:
+        return len(self._shoe_order) - self._position
+
+    @property
+    def true_count(self) -> float:
+        # the running count per deck left in the shoe
+        return self.running_count * cards_per_deck / max(self.remaining_card_count, 1)
+
+    def draw_card_index(self) -> int:
+        if self._position == len(self._shoe_order):
+            # the shoe ran out in the middle of a round
+            self.shuffle()
+        card_index = self._shoe_order[self._position]
+        self._position += 1
+        self.remaining_counts[card_index] -= 1
+        self.running_count += _hi_lo_tag_list[card_index]
+        return card_index
+
+    def draw_card(self) -> game_definitions.Card:
+        return card_source.cards[self.draw_card_index()]
+
+    def draw_card_indices(self, count: int) -> np.ndarray:
+        card_indices = []
+        while count > 0:
+            if self._position == len(self._shoe_order):
+                self.shuffle()
+            dealt = self._shoe[self._position:self._position + count]
+            self._position += len(dealt)
+            self.remaining_counts -= np.bincount(dealt, minlength=len(card_source.cards))
+            self.running_count += int(card_index_hi_lo_tags[dealt].sum())
+            card_indices.append(dealt)
+            count -= len(dealt)
+        return np.concatenate(card_indices) if card_indices else np.zeros(0, dtype=np.int64)
+
+
+class CountingEnvironmentModel(environment_model.EnvironmentModel):
+    """
+    An environment model whose states additionally include the bucket of the true count of a shoe,
+    every bucket has a table of its own so count-dependent policies can be learned.
+    The bulk accessors are not supported since the count is only known while a hand is being played.
+    """
+
+    def __init__(self, player_shoe: Shoe, count_bucket_edges: Tuple[float, ...] = (-2, -1, 1, 2)):
+        super().__init__()
+        self.shoe = player_shoe
+        self.count_bucket_edges = list(count_bucket_edges)
+        counting_table_shape = (len(self.count_bucket_edges) + 1,) + environment_model.table_shape
+        self.state_to_value = np.zeros(counting_table_shape, dtype=np.float64)
+        self.state_visit_count = np.zeros(counting_table_shape, dtype=np.int64)
+        self.state_explore_count = np.zeros(counting_table_shape, dtype=np.int64)
+
+    def get_count_bucket(self) -> int:
+        return bisect.bisect_right(self.count_bucket_edges, self.shoe.true_count)
+
+    def convert_to_state(self, player_deck: Union[hand.Hand, List[game_definitions.Card]], dealer_card) -> Tuple[int, int, bool, int]:
+        return environment_model.EnvironmentModel.convert_to_state(player_deck, dealer_card) + (self.get_count_bucket(),)
+
+    def get_state_action_index(self, state: Tuple[int, int, bool, int], action: game_definitions.Action) -> Tuple[int, int, int, int, int]:
+        player_sum, dealer_value, usable_ace, count_bucket = state
+        return count_bucket, player_sum, dealer_value, int(usable_ace), environment_model.action_indices[action]
+
+    def get_state_action_flat_index(self, state: Tuple[int, int, bool, int], action: game_definitions.Action) -> int:
+        count_bucket = state[3]
+        return count_bucket * environment_model.table_size \
+            + environment_model.EnvironmentModel.get_state_action_flat_index(state[:3], action)
+
+    # the hot scalar accessors of the base class compute the flat index of three-element states inline
+    def get_state_action_value(self, state, action):
+        return self._value_view[self.get_state_action_flat_index(state, action)]
+
+    def set_state_action_value(self, state, action, new_value):
+        self._value_view[self.get_state_action_flat_index(state, action)] = new_value
+
+    def update_state_action_value(self, state, action, target, learning_rate):
+        index = self.get_state_action_flat_index(state, action)
+        value = self._value_view[index]
+        value += learning_rate * (target - value)
+        self._value_view[index] = value
+        self._visit_count_view[index] += 1
+        return value
+
+    def increment_state_action_explore_counter(self, state, action, amount=1):
+        self._explore_count_view[self.get_state_action_flat_index(state, action)] += amount
+
+    def get_state_action_indices(self, player_sums, dealer_values, usable_aces, actions):
+        raise NotImplementedError()
+
+    def get_state_action_values(self, player_sums, dealer_values, usable_aces, action):
+        raise NotImplementedError()
+
+    def get_state_action_flat_indices(self, player_sums, dealer_values, usable_aces, actions):
+        raise NotImplementedError()
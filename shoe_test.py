@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+import card_source
+import environment_model
+import game_definitions
+import game_logic
+import player
+import random_learning_strategy
+import shoe
+
+
+def test_whole_shoe_has_the_composition_of_its_decks():
+    player_shoe = shoe.Shoe(deck_count=2, penetration=1, seed=123)
+    card_indices = [player_shoe.draw_card_index() for _ in range(2 * shoe.cards_per_deck)]
+    assert np.all(np.bincount(card_indices) == 2 * shoe.cards_per_rank_in_deck)
+    assert np.all(player_shoe.remaining_counts == 0)
+    # the Hi-Lo count is balanced
+    assert player_shoe.running_count == 0
+    assert player_shoe.shuffle_count == 1
+
+
+def test_bulk_draws_keep_the_counts_consistent():
+    player_shoe = shoe.Shoe(deck_count=1, penetration=1, seed=123)
+    card_indices = player_shoe.draw_card_indices(30)
+    assert player_shoe.remaining_card_count == shoe.cards_per_deck - 30
+    assert player_shoe.remaining_counts.sum() == shoe.cards_per_deck - 30
+    assert player_shoe.running_count == shoe.card_index_hi_lo_tags[card_indices].sum()
+    # drawing past the end of the shoe reshuffles it
+    player_shoe.draw_card_indices(30)
+    assert player_shoe.shuffle_count == 2
+    assert player_shoe.remaining_card_count == 2 * shoe.cards_per_deck - 60
+
+
+def test_shoe_is_reshuffled_between_rounds_at_the_penetration():
+    player_shoe = shoe.Shoe(deck_count=1, penetration=.5, seed=123)
+    for _ in range(25):
+        player_shoe.draw_card()
+    player_shoe.begin_round()
+    assert player_shoe.shuffle_count == 1
+    player_shoe.draw_card()
+    player_shoe.begin_round()
+    assert player_shoe.shuffle_count == 2
+    assert player_shoe.remaining_card_count == shoe.cards_per_deck
+
+
+def test_counting_model_learns_a_table_per_count_bucket():
+    player_shoe = shoe.Shoe(deck_count=6, penetration=.75, seed=123)
+    counting_model = shoe.CountingEnvironmentModel(player_shoe)
+    learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=counting_model,
+        probability_of_random_choice=.1,
+        default_probability_of_stand=.5,
+        random_source=card_source.CardSource(seed=123)
+        )
+    player_instance = player.Player(strategy=learning_strategy)
+    for _ in range(3_000):
+        game_status, player_visited_bare_states = game_logic.play(player_instance, player_shoe)
+        assert all(len(state) == 4 for state, _ in player_visited_bare_states)
+        player_instance.end_game(game_logic.get_player_reward(game_status), player_visited_bare_states, 1.0, .1)
+    visited_buckets = np.flatnonzero(counting_model.state_visit_count.reshape(len(counting_model.count_bucket_edges) + 1, -1).sum(axis=1))
+    assert len(visited_buckets) > 1
+    assert counting_model.state_explore_count.sum() >= 3_000
+
+
+@pytest.mark.parametrize("dealer_resolution", [
+    game_definitions.DealerResolution.SAMPLE,
+    game_definitions.DealerResolution.EXPECTED
+])
+def test_dealer_outcome_is_not_sampled_from_a_shoe(dealer_resolution):
+    class RandomShoe(shoe.Shoe):
+        # random numbers alone do not make the deck infinite
+        def random(self) -> float:
+            return self.generator.random()
+
+    player_instance = player.Player(strategy=random_learning_strategy.Random_learning_strategy(
+        environment_model=environment_model.EnvironmentModel(),
+        # always stands, so the dealer outcome is needed right away
+        probability_of_random_choice=1,
+        default_probability_of_stand=1,
+        random_source=card_source.CardSource(seed=123)
+        ))
+    with pytest.raises(Exception, match="infinite deck"):
+        game_logic.play(player_instance, RandomShoe(seed=123), dealer_resolution)
+    with pytest.raises(Exception, match="infinite deck"):
+        game_logic.play_expected_reward(player_instance, RandomShoe(seed=123))
+
+
+def test_lockstep_batches_refuse_a_shoe():
+    player_shoe = shoe.Shoe(deck_count=6, penetration=.75, seed=123)
+    learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=environment_model.EnvironmentModel(),
+        probability_of_random_choice=.1,
+        default_probability_of_stand=.5,
+        random_source=card_source.CardSource(seed=123)
+        )
+    # dealing a whole batch at once would skip the reshuffle at the penetration
+    with pytest.raises(Exception, match="infinite deck"):
+        game_logic.play_batch(learning_strategy, 1_000, player_shoe)
+    with pytest.raises(Exception, match="infinite deck"):
+        next(game_logic.play_episodes(player.Player(strategy=learning_strategy), 1_000, 100, player_shoe))
+    assert player_shoe.remaining_card_count == 6 * shoe.cards_per_deck
@@ -1,20 +1,59 @@
-from typing import List, Tuple
+from typing import List, Tuple, Union
+import numpy as np
 import game_definitions
+import hand
 
 class Strategy:
     """ An interface that represents player's strategy and their reaction after the game ended """
 
+    # an optional card_source.CardSource that supplies random numbers, the global numpy state is used otherwise
+    random_source = None
+
+    def draw_random(self) -> float:
+        return np.random.random() if self.random_source is None else self.random_source.random()
+
+    def draw_randoms(self, count: int) -> np.ndarray:
+        return np.random.random(count) if self.random_source is None else self.random_source.random_array(count)
+
     def take_action(
         self,
-        player_deck: List[game_definitions.Card],
+        player_deck: Union[hand.Hand, List[game_definitions.Card]],
         dealer_card: game_definitions.Card
         ) -> game_definitions.Action:
             raise NotImplementedError()
 
+    def take_actions(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray
+        ) -> np.ndarray:
+            """ Bulk version of take_action, returns the values of game_definitions.Action for every state given column-wise """
+            raise NotImplementedError()
+
+    def stand_probabilities(
+        self,
+        player_sums: np.ndarray,
+        dealer_values: np.ndarray,
+        usable_aces: np.ndarray
+        ) -> np.ndarray:
+            """ The probabilities with which take_actions stands in every state given column-wise """
+            raise NotImplementedError()
+
     def game_finished(
         self,
         final_reward: float,
         player_visited_bare_states: List[Tuple[int, int, game_definitions.Action]],
         discount_factor: float
         ):
+            raise NotImplementedError()
+
+    def game_finished_batch(
+        self,
+        final_rewards: np.ndarray,
+        trajectories,
+        discount_factor: float,
+        learning_rate: float
+        ):
+            """ Bulk version of game_finished for the hands of a game_logic.BatchTrajectories and their final rewards """
             raise NotImplementedError()
\ No newline at end of file
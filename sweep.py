@@ -0,0 +1,116 @@
+import concurrent.futures
+import csv
+import itertools
+import json
+import os
+from typing import List
+
+import training
+
+# the columns of the results table in the order they are written
+result_columns = [
+    "episode_count",
+    "probability_of_random_choice",
+    "learning_rate",
+    "discount_factor",
+    "random_seed",
+    "final_win_ratio",
+    "latest_win_ratio",
+    "draw_ratio",
+    "maximal_value_error",
+    "mean_value_error",
+    "policy_agreement",
+    "wall_time_seconds",
+]
+
+
+def expand_grid(
+    episode_count_list: List[int],
+    probability_of_random_choice_list: List[float],
+    learning_rate_list: List[float],
+    discount_factor_list: List[float],
+    random_seed_list: List[int]
+    ) -> List[dict]:
+    return [
+        {
+            "episode_count": episode_count,
+            "probability_of_random_choice": probability_of_random_choice,
+            "learning_rate": learning_rate,
+            "discount_factor": discount_factor,
+            "random_seed": random_seed,
+        }
+        for episode_count, probability_of_random_choice, learning_rate, discount_factor, random_seed in itertools.product(
+            episode_count_list,
+            probability_of_random_choice_list,
+            learning_rate_list,
+            discount_factor_list,
+            random_seed_list
+        )
+    ]
+
+
+def get_job_name(job: dict) -> str:
+    return ",".join(f"{key}-{value}" for key, value in job.items())
+
+
+def get_job_result_path(job: dict, results_directory: str) -> str:
+    return os.path.join(results_directory, f"{get_job_name(job)}.json")
+
+
+def run_job(job: dict, results_directory: str) -> dict:
+    _, training_summary = training.train_and_summarize(**job)
+    result = {**job, **training_summary}
+    # the rename makes sure an interrupted job is never mistaken for a finished one
+    result_path = get_job_result_path(job, results_directory)
+    with open(f"{result_path}.tmp", "w") as result_file:
+        json.dump(result, result_file, indent=2)
+    os.replace(f"{result_path}.tmp", result_path)
+    return result
+
+
+def run_sweep(jobs: List[dict], results_directory: str, max_workers: int) -> List[dict]:
+    """
+    Runs every job whose result does not exist yet on a pool of at most max_workers processes
+    and writes the results of all jobs into results.csv inside results_directory
+    """
+    os.makedirs(results_directory, exist_ok=True)
+    pending_jobs = [job for job in jobs if not os.path.exists(get_job_result_path(job, results_directory))]
+    print(f"Running {len(pending_jobs)} jobs, skipping {len(jobs) - len(pending_jobs)} finished ones")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        future_to_job = {executor.submit(run_job, job, results_directory): job for job in pending_jobs}
+        for finished_job_count, future in enumerate(concurrent.futures.as_completed(future_to_job), start=1):
+            # reraises the exception of a failed job
+            future.result()
+            print(f"Finished {finished_job_count} out of {len(pending_jobs)} jobs: {get_job_name(future_to_job[future])}")
+
+    results = []
+    for job in jobs:
+        with open(get_job_result_path(job, results_directory)) as result_file:
+            results.append(json.load(result_file))
+    with open(os.path.join(results_directory, "results.csv"), "w", newline="") as table_file:
+        writer = csv.DictWriter(table_file, fieldnames=result_columns)
+        writer.writeheader()
+        writer.writerows(results)
+    return results
+
+
+if __name__ == "__main__":
+    episode_count_list = [100_000, 1_000_000]
+    probability_of_random_choice_list = [0.05, 0.1, 0.2]
+    learning_rate_list = [0.01, 0.1]
+    # also known as gamma
+    discount_factor_list = [1.0]
+    random_seed_list = [123, 124, 125]
+    results_directory = "sweep_results"
+    max_workers = os.cpu_count()
+
+    jobs = expand_grid(
+        episode_count_list,
+        probability_of_random_choice_list,
+        learning_rate_list,
+        discount_factor_list,
+        random_seed_list
+    )
+    results = run_sweep(jobs, results_directory, max_workers)
+    best_job, best_result = max(zip(jobs, results), key=lambda job_and_result: job_and_result[1]["policy_agreement"])
+    print(f"Best policy agreement {best_result['policy_agreement']: .5f} for {get_job_name(best_job)}")
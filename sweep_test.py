@@ -0,0 +1,24 @@
+import csv
+import os
+
+import sweep
+
+
+def test_sweep_runs_every_job_once(tmp_path):
+    results_directory = str(tmp_path)
+    jobs = sweep.expand_grid([200], [.1, .2], [.1], [1.0], [123])
+    assert len(jobs) == 2
+    results = sweep.run_sweep(jobs, results_directory, max_workers=2)
+    assert [result["probability_of_random_choice"] for result in results] == [.1, .2]
+    assert all(0 <= result["policy_agreement"] <= 1 for result in results)
+
+    result_path = sweep.get_job_result_path(jobs[0], results_directory)
+    modification_time = os.path.getmtime(result_path)
+    sweep.run_sweep(jobs, results_directory, max_workers=2)
+    # finished jobs are skipped
+    assert os.path.getmtime(result_path) == modification_time
+
+    with open(os.path.join(results_directory, "results.csv")) as table_file:
+        rows = list(csv.DictReader(table_file))
+    assert len(rows) == 2
+    assert set(rows[0]) == set(sweep.result_columns)
@@ -0,0 +1,164 @@
+"""
+Headless training without any plotting.
+
+    python training.py --episode-count 1000000 --random-seed 7 --value-table table.npy --summary summary.json
+    python training.py --config config.json --plot heatmap.html
+
+The config file is a JSON object with the keys of default_config, flags override it.
+Plotly is only imported when a plot is requested.
+"""
+import argparse
+import json
+import time
+from typing import List, Optional, Tuple
+
+import card_source
+import environment_model
+import exact_solver
+import game_logic
+import player
+import policy_export
+import random_learning_strategy
+import running_statistics
+
+
+def train(
+    episode_count: int,
+    probability_of_random_choice: float,
+    learning_rate: float,
+    discount_factor: float,
+    random_seed: int,
+    default_probability_of_stand: float = .5,
+    episodes_per_batch: int = 1_000,
+    latest_entry_count_for_summary: int = 10_000
+    ) -> Tuple[environment_model.EnvironmentModel, running_statistics.RunningStatistics]:
+    """ The training loop of main.py without any printing, plotting or checkpoints """
+    player_card_source = card_source.CardSource(random_seed)
+    player_environment_model = environment_model.EnvironmentModel()
+    player_learning_strategy = random_learning_strategy.Random_learning_strategy(
+        environment_model=player_environment_model,
+        probability_of_random_choice=probability_of_random_choice,
+        default_probability_of_stand=default_probability_of_stand,
+        random_source=player_card_source
+        )
+    player_instance = player.Player(strategy=player_learning_strategy)
+    player_statistics = running_statistics.RunningStatistics(latest_entry_count_for_summary)
+
+    episodes = game_logic.play_episodes(player_instance, episode_count, episodes_per_batch, player_card_source)
+    for game_status, player_visited_bare_states in episodes:
+        player_instance.end_game(
+            game_logic.get_player_reward(game_status),
+            player_visited_bare_states,
+            discount_factor,
+            learning_rate
+            )
+        player_statistics.update(game_status)
+    return player_environment_model, player_statistics
+
+
+def train_and_summarize(**training_arguments) -> Tuple[environment_model.EnvironmentModel, dict]:
+    """ Runs train() and summarizes the outcome, including how far the learned table is from the exact solution """
+    start = time.perf_counter()
+    player_environment_model, player_statistics = train(**training_arguments)
+    wall_time_seconds = time.perf_counter() - start
+
+    exact_environment_model = exact_solver.solve()
+    maximal_value_error, mean_value_error = exact_solver.get_value_errors(player_environment_model, exact_environment_model)
+    return player_environment_model, {
+        "final_win_ratio": player_statistics.win_ratio,
+        "latest_win_ratio": player_statistics.latest_win_ratio,
+        "draw_ratio": player_statistics.draw_ratio,
+        "maximal_value_error": maximal_value_error,
+        "mean_value_error": mean_value_error,
+        "policy_agreement": exact_solver.get_policy_agreement(player_environment_model, exact_environment_model),
+        "wall_time_seconds": wall_time_seconds,
+    }
+
+
+default_config = {
+    "episode_count": 100_000,
+    "probability_of_random_choice": 0.1,
+    "learning_rate": 0.1,
+    # also known as gamma
+    "discount_factor": 1.0,
+    "random_seed": 123,
+    "default_probability_of_stand": .5,
+    "episodes_per_batch": 1_000,
+    "latest_entry_count_for_summary": 10_000,
+    # the outputs, None skips them
+    "value_table_path": None,
+    "summary_path": None,
+    "plot_path": None,
+}
+# the parameters of train() among the keys of default_config
+training_parameters = [
+    "episode_count",
+    "probability_of_random_choice",
+    "learning_rate",
+    "discount_factor",
+    "random_seed",
+    "default_probability_of_stand",
+    "episodes_per_batch",
+    "latest_entry_count_for_summary",
+]
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", help="a JSON file with any keys of the default config")
+    parser.add_argument("--episode-count", type=int)
+    parser.add_argument("--probability-of-random-choice", type=float)
+    parser.add_argument("--learning-rate", type=float)
+    parser.add_argument("--discount-factor", type=float)
+    parser.add_argument("--random-seed", type=int)
+    parser.add_argument("--default-probability-of-stand", type=float)
+    parser.add_argument("--episodes-per-batch", type=int)
+    parser.add_argument("--latest-entry-count-for-summary", type=int)
+    parser.add_argument("--value-table", dest="value_table_path", help="where the learned value table is exported as .npy")
+    parser.add_argument("--summary", dest="summary_path", help="where the summary is written as JSON")
+    parser.add_argument("--plot", dest="plot_path", help="where the strategy heatmap is written as HTML")
+    return parser
+
+
+def load_config(argv: Optional[List[str]] = None) -> dict:
+    """ Merges default_config, the config file and the flags, later ones take precedence """
+    arguments = vars(get_argument_parser().parse_args(argv))
+    config = dict(default_config)
+    config_path = arguments.pop("config")
+    if config_path is not None:
+        with open(config_path) as config_file:
+            file_config = json.load(config_file)
+        unknown_keys = set(file_config) - set(default_config)
+        if unknown_keys:
+            raise Exception(f"Unknown keys in {config_path}: {', '.join(sorted(unknown_keys))}")
+        config.update(file_config)
+    config.update({key: value for key, value in arguments.items() if value is not None})
+    return config
+
+
+def run(config: dict) -> dict:
+    """ Trains with the given config, writes the requested outputs and returns the summary """
+    player_environment_model, training_summary = train_and_summarize(**{key: config[key] for key in training_parameters})
+    summary = {**config, **training_summary}
+    if config["value_table_path"] is not None:
+        policy_export.export_value_table(player_environment_model, config["value_table_path"])
+    if config["summary_path"] is not None:
+        with open(config["summary_path"], "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+    if config["plot_path"] is not None:
+        # importing plotly takes longer than short training runs, so it is only paid for when plotting
+        import visualization
+        visualization.write_strategy_heatmap(
+            player_environment_model.state_to_value,
+            config["plot_path"],
+            f"Strategy after {config['episode_count']} episodes"
+        )
+    return summary
+
+
+if __name__ == "__main__":
+    summary = run(load_config())
+    print(
+        f"Win ratio {summary['final_win_ratio']: .5f} policy agreement {summary['policy_agreement']: .5f}"
+        f" after {summary['episode_count']} episodes in {summary['wall_time_seconds']: .1f} s"
+    )
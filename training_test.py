@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import training
+
+
+def test_flags_override_the_config_file(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"episode_count": 5, "learning_rate": .2}))
+    config = training.load_config(["--config", str(config_path), "--episode-count", "7"])
+    assert config["episode_count"] == 7
+    assert config["learning_rate"] == .2
+    assert config["random_seed"] == training.default_config["random_seed"]
+
+
+def test_headless_run_never_imports_plotly(tmp_path):
+    value_table_path = tmp_path / "table.npy"
+    summary_path = tmp_path / "summary.json"
+    script = (
+        "import sys, training;"
+        f"training.run(training.load_config(['--episode-count', '2000', '--value-table', {str(value_table_path)!r}, '--summary', {str(summary_path)!r}]));"
+        "assert 'plotly' not in sys.modules and 'visualization' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.abspath(training.__file__)))
+    with open(summary_path) as summary_file:
+        summary = json.load(summary_file)
+    assert summary["episode_count"] == 2000
+    assert 0 < summary["policy_agreement"] <= 1
+    assert np.load(value_table_path).shape == training.environment_model.table_shape
@@ -1,38 +1,89 @@
+import concurrent.futures
+import os
+
 import numpy as np
 
 import plotly as py
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+import episode_log
 import game_definitions
 import player
 import environment_model
 
-def draw_figure(
-    player_win_history,
-    player_win_history_average,
-    player_win_history_std,
-    episode_count
-    ):
-    # figure drawing part
-    print("Constructing an interactive graph, please wait for a couple of seconds.")
-    x = list(range(len(player_win_history)))
+class MinMaxDownsampler:
+    """
+    Keeps the minimum and the maximum of each of max_point_count // 2 equally long buckets in their original order,
+    so that the shape of the curve including its spikes survives no matter how long it is.
+    The curve of the given length is fed in consecutive chunks, only the kept points and one partial bucket are held
+    """
+
+    def __init__(self, length: int, max_point_count: int):
+        self.length = length
+        # short curves are kept whole
+        self.bucket_size = 1 if length <= max_point_count else -(-length // (max_point_count // 2))
+        self._pending = np.zeros(0)
+        self._pending_start = 0
+        self._indices = []
+        self._values = []
+
+    def add(self, chunk):
+        self._pending = np.concatenate((self._pending, np.asarray(chunk, dtype=np.float64)))
+        self._process(len(self._pending) // self.bucket_size * self.bucket_size)
+
+    def _process(self, point_count: int):
+        if point_count == 0:
+            return
+        if self.bucket_size == 1:
+            bucket_indices = np.arange(point_count)
+        else:
+            # the last bucket of the curve is padded by repeating its last point
+            bucket_count = -(-point_count // self.bucket_size)
+            buckets = np.pad(
+                self._pending[:point_count], (0, bucket_count * self.bucket_size - point_count), mode="edge"
+            ).reshape(bucket_count, self.bucket_size)
+            bucket_starts = np.arange(bucket_count)[:, None] * self.bucket_size
+            extreme_positions = np.sort(np.stack((buckets.argmin(axis=1), buckets.argmax(axis=1)), axis=1), axis=1)
+            bucket_indices = np.unique(np.minimum(bucket_starts + extreme_positions, point_count - 1))
+        self._indices.append(self._pending_start + bucket_indices)
+        self._values.append(self._pending[bucket_indices])
+        self._pending = self._pending[point_count:]
+        self._pending_start += point_count
 
+    def get_points(self):
+        """ Returns the indices of the kept points and their values """
+        self._process(len(self._pending))
+        if not self._indices:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        return np.concatenate(self._indices), np.concatenate(self._values)
+
+
+def downsample_min_max(y, max_point_count: int):
+    """ Downsamples the whole curve y with MinMaxDownsampler, returns the indices of the kept points and their values """
+    y = np.asarray(y)
+    downsampler = MinMaxDownsampler(len(y), max_point_count)
+    downsampler.add(y)
+    indices, _ = downsampler.get_points()
+    return indices, y[indices]
+
+
+def _write_training_curves(average_x, average_y, std_x, std_y, episode_count, output_path: str):
     titles = (
         "Total average number of wins since the beginning",
         "Total standard deviation since the beginning (log plot)"
     )
     fig = make_subplots(rows=2, cols=1, subplot_titles=titles)
-    fig.append_trace(go.Scatter(
-        x=x,
-        y=player_win_history_average
+    fig.add_trace(go.Scatter(
+        x=average_x,
+        y=average_y
     ), row=1, col=1)
     fig.update_xaxes(title_text="Number of iterations", row=1, col=1)
     fig.update_yaxes(title_text=r"$\text{Total average ratio of player win count to casino win count } (\mu)$", range=[
         0, 1], row=1, col=1)
-    fig.append_trace(go.Scatter(
-        x=x,
-        y=player_win_history_std
+    fig.add_trace(go.Scatter(
+        x=std_x,
+        y=std_y
     ), row=2, col=1)
     fig.update_xaxes(title_text="Number of iterations", row=2, col=1)
     fig.update_yaxes(
@@ -41,33 +92,114 @@ def draw_figure(
         showlegend=False,
         title_text=f"Blackjack Reinforcement Learning algorithm summary after playing {episode_count} games"
     )
+    if output_path.endswith(".json"):
+        fig.write_json(output_path)
+    else:
+        fig.write_html(output_path, include_plotlyjs=True)
+    print(f"Saved the graph into {output_path}")
 
 
-def draw_strategy_heatmap(envmodel: environment_model.EnvironmentModel):
+def draw_figure(
+    player_win_history_average,
+    player_win_history_std,
+    episode_count,
+    output_path: str,
+    max_point_count: int = 2_000
+    ):
+    """
+    Writes the training curves into a self-contained HTML file, or into a JSON file if output_path ends with .json,
+    every curve is downsampled to at most max_point_count points first
+    """
+    # figure drawing part
+    print("Constructing an interactive graph, please wait for a couple of seconds.")
+    average_x, average_y = downsample_min_max(player_win_history_average, max_point_count)
+    std_x, std_y = downsample_min_max(player_win_history_std, max_point_count)
+    _write_training_curves(average_x, average_y, std_x, std_y, episode_count, output_path)
+
+
+def draw_episode_log_figure(
+    episode_log_path: str,
+    output_path: str,
+    max_point_count: int = 2_000,
+    chunk_size: int = 1 << 20
+    ):
+    """ Writes the training curves of an episode_log file just like draw_figure(), reading it chunk by chunk """
+    print("Constructing an interactive graph, please wait for a couple of seconds.")
+    records = episode_log.read_episode_log(episode_log_path)
+    average_downsampler = MinMaxDownsampler(len(records), max_point_count)
+    std_downsampler = MinMaxDownsampler(len(records), max_point_count)
+    for win_ratios, win_ratio_stds in episode_log.iterate_win_ratio_chunks(records, chunk_size):
+        average_downsampler.add(win_ratios)
+        std_downsampler.add(win_ratio_stds)
+    average_x, average_y = average_downsampler.get_points()
+    std_x, std_y = std_downsampler.get_points()
+    _write_training_curves(average_x, average_y, std_x, std_y, len(records), output_path)
+
+
+def build_strategy_heatmap_figure(state_to_value: np.ndarray, title: str = None):
     def get_matrix_dealer_value_player_sum(usable_ace: bool, action: game_definitions.Action):
-        matrix = np.zeros(
-            (
-                len(game_definitions.Card),
-                game_definitions.bust_from
-            )
-        )
-        for player_sum in range(2, game_definitions.bust_from):
-            if not (usable_ace and player_sum < 11):
-                card_maximum_values = (max(game_definitions.card_values[card]) for card in game_definitions.Card)
-                for dealer_card_value in set(card_maximum_values):
-                    state = (player_sum, dealer_card_value, usable_ace)
-                    state_action_value = envmodel.get_state_action_value(state, action)
-                    matrix[dealer_card_value, player_sum] = state_action_value
-        return matrix
-    print("Drawing heatmaps...")
+        # rows are dealer card values and columns are player sums, both starting at 2
+        return state_to_value[
+            2:game_definitions.bust_from,
+            2:environment_model.dealer_value_count,
+            int(usable_ace),
+            environment_model.action_indices[action]
+        ].T
     titles = ("Unusable ace, HIT", "Unusable ace, STAND", "Usable ace, HIT", "Usable ace, STAND")
     fig = make_subplots(rows=2, cols=2, subplot_titles=titles)
     xs = [f"player sum {i}" for i in range(2, game_definitions.bust_from)]
-    ys = [f"dealer card value {i}" for i in range(2, 12)]
+    ys = [f"dealer card value {i}" for i in range(2, environment_model.dealer_value_count)]
     for row, usable_ace in enumerate([False, True]):
         for column, action in enumerate([game_definitions.Action.HIT, game_definitions.Action.STAND]):
             matrix = get_matrix_dealer_value_player_sum(usable_ace, action)
             heatmap = go.Heatmap(z=matrix, x=xs, y=ys)
             fig.add_trace(heatmap, row=row+1, col=column+1)
-    fig.show()
-    print("Done drawing heatmaps")
\ No newline at end of file
+    if title is not None:
+        fig.update_layout(title_text=title)
+    return fig
+
+
+def draw_strategy_heatmap(envmodel: environment_model.EnvironmentModel):
+    print("Drawing heatmaps...")
+    build_strategy_heatmap_figure(envmodel.state_to_value).show()
+    print("Done drawing heatmaps")
+
+
+def write_strategy_heatmap(state_to_value: np.ndarray, output_path: str, title: str):
+    # plotly.js is written once next to the snapshots instead of being embedded into each of them
+    build_strategy_heatmap_figure(state_to_value, title).write_html(output_path, include_plotlyjs="directory")
+
+
+class HeatmapSnapshotWriter:
+    """
+    Renders strategy heatmaps in a background process into numbered HTML files,
+    the caller only pays for copying the value table
+    """
+
+    def __init__(self, output_directory: str, file_name_prefix: str):
+        os.makedirs(output_directory, exist_ok=True)
+        self.output_directory = output_directory
+        self.file_name_prefix = file_name_prefix
+        self.snapshot_count = 0
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+        self._pending_renders = []
+
+    def submit(self, envmodel: environment_model.EnvironmentModel, episode_count: int):
+        output_path = os.path.join(self.output_directory, f"{self.file_name_prefix}-{self.snapshot_count:04d}.html")
+        self._pending_renders.append(self._executor.submit(
+            write_strategy_heatmap,
+            envmodel.state_to_value.copy(),
+            output_path,
+            f"Strategy after {episode_count} episodes"
+        ))
+        self.snapshot_count += 1
+        # rendering errors surface as soon as they are noticed
+        while self._pending_renders and self._pending_renders[0].done():
+            self._pending_renders.pop(0).result()
+
+    def close(self):
+        # waits until every submitted snapshot is written
+        self._executor.shutdown(wait=True)
+        for pending_render in self._pending_renders:
+            pending_render.result()
+        self._pending_renders = []
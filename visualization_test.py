@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+import environment_model
+import episode_log
+import visualization
+
+
+def test_min_max_downsampling_keeps_extremes_in_order():
+    np.random.seed(123)
+    y = np.cumsum(np.random.normal(size=100_003))
+    y[54_321] = 1e6
+    indices, values = visualization.downsample_min_max(y, 1_000)
+    assert len(indices) <= 1_000
+    assert np.all(np.diff(indices) > 0)
+    assert np.array_equal(values, y[indices])
+    assert values.max() == y.max()
+    assert values.min() == y.min()
+
+
+def test_short_curves_are_not_downsampled():
+    indices, values = visualization.downsample_min_max([3, 1, 2], 1_000)
+    assert list(indices) == [0, 1, 2]
+    assert list(values) == [3, 1, 2]
+
+
+def test_figure_is_written_to_a_file(tmp_path):
+    average = np.linspace(0, .4, 1_000_000)
+    std = np.linspace(.5, .49, 1_000_000)
+    output_path = str(tmp_path / "curves.json")
+    visualization.draw_figure(average, std, 1_000_000, output_path, max_point_count=500)
+    with open(output_path) as figure_file:
+        assert len(figure_file.read()) < 100_000
+
+
+def test_heatmap_snapshots_are_written_in_the_background(tmp_path):
+    em = environment_model.EnvironmentModel()
+    heatmap_writer = visualization.HeatmapSnapshotWriter(str(tmp_path), "strategy")
+    for episode_count in range(3):
+        em.state_to_value += 1
+        heatmap_writer.submit(em, episode_count)
+    heatmap_writer.close()
+    assert sorted(os.listdir(tmp_path)) == [
+        "plotly.min.js",
+        "strategy-0000.html",
+        "strategy-0001.html",
+        "strategy-0002.html"
+    ]
+
+
+def test_chunked_downsampling_matches_whole_curve():
+    np.random.seed(123)
+    y = np.cumsum(np.random.normal(size=100_003))
+    downsampler = visualization.MinMaxDownsampler(len(y), 1_000)
+    for chunk_start in range(0, len(y), 7_777):
+        downsampler.add(y[chunk_start:chunk_start + 7_777])
+    chunked_indices, chunked_values = downsampler.get_points()
+    indices, values = visualization.downsample_min_max(y, 1_000)
+    assert np.array_equal(chunked_indices, indices)
+    assert np.array_equal(chunked_values, values)
+
+
+def test_episode_log_figure_is_written_to_a_file(tmp_path):
+    log_path = str(tmp_path / "episodes.eplog")
+    with episode_log.EpisodeLogWriter(log_path) as writer:
+        writer.append_batch(np.ones(100_000, dtype=np.int8), np.ones(100_000), np.ones(100_000, dtype=np.uint8))
+    output_path = str(tmp_path / "curves.json")
+    visualization.draw_episode_log_figure(log_path, output_path, max_point_count=500, chunk_size=10_000)
+    assert os.path.getsize(output_path) < 100_000